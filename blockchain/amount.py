@@ -0,0 +1,51 @@
+"""Define methods to compute the amounts moved by a block.
+
+https://github.com/bitcoin/bitcoin/blob/master/src/amount.h
+NB: 1 BTC = 100 000 000 satoshis
+The amounts follow the definition of the btc.block table:
+- the subsidy is the amount created by the block, halved every 210 000 blocks
+- the input and output are the sums of the inputs and outputs of the non coinbase transactions
+- the transaction fee is the difference between the input and the output
+"""
+from typing import NamedTuple
+
+COIN = 100000000
+INITIAL_SUBSIDY = 50 * COIN
+HALVING_INTERVAL = 210000
+
+
+class Amounts(NamedTuple):
+    """Represent the amounts of a block in satoshis.
+    """
+
+    subsidy: int
+    input: int
+    output: int
+    transaction_fee: int
+
+
+def subsidy(height: int) -> int:
+    """Compute the block subsidy from the halving schedule.
+
+    https://github.com/bitcoin/bitcoin/blob/master/src/validation.cpp (GetBlockSubsidy)
+
+    :param height: the height of the block.
+    """
+    halvings = height // HALVING_INTERVAL
+    if halvings >= 64:
+        return 0
+    return INITIAL_SUBSIDY >> halvings
+
+
+def from_coinbase(height: int, coinbase_value: int, output: int) -> Amounts:
+    """Derive the amounts of a block from its coinbase, without resolving the spent outputs.
+    The fee is taken as what the coinbase claims on top of the subsidy. This is exact unless the miner
+    claimed less than the full reward, in which case the fee is underestimated.
+
+    :param height: the height of the block.
+    :param coinbase_value: the sum of the outputs of the coinbase transaction.
+    :param output: the sum of the outputs of the non coinbase transactions.
+    """
+    reward = subsidy(height)
+    fee = max(coinbase_value - reward, 0)
+    return Amounts(reward, output + fee, output, fee)
@@ -2,14 +2,30 @@
 """
 from __future__ import annotations
 
+import struct
+from typing import Iterator, Union
 
-class Block:
-    """Represent a block.
+from blockchain.hashing import double_sha256, hash_many
+from blockchain.transaction import Transaction, TransactionList
+
+# the layout of the 80 bytes block header.
+# https://en.bitcoin.it/wiki/Protocol_documentation#Block_Headers
+HEADER = struct.Struct("<I32s32sIII")
+
+# the size in bytes of a block hash.
+DIGEST_SIZE = 32
+
+
+class BlockHeader:
+    """Represent a block header.
     """
 
-    # TODO: use proper block header class
-    def __init__(self, version, prev_block, merkle_root, timestamp, bits, nonce, payload):
+    __slots__ = ("version", "prev_block", "merkle_root", "timestamp", "bits", "nonce", "raw", "_hash")
+
+    def __init__(self, version, prev_block, merkle_root, timestamp, bits, nonce, raw=None):
         """Constructor.
+
+        :param raw: the serialized header, computed from the fields if not provided.
         """
         self.version = version
         self.prev_block = prev_block
@@ -17,23 +33,229 @@ class Block:
         self.timestamp = timestamp
         self.bits = bits
         self.nonce = nonce
+        if raw is None:
+            raw = HEADER.pack(version, prev_block, merkle_root, timestamp, bits, nonce)
+        self.raw = raw
+        self._hash = None
+
+    @property
+    def hash(self) -> bytes:
+        """The hash of the header, in internal byte order. It is computed once and cached.
+
+        https://en.bitcoin.it/wiki/Block_hashing_algorithm
+        """
+        if self._hash is None:
+            self._hash = double_sha256(self.raw)
+        return self._hash
+
+    @staticmethod
+    def deserialize(data: Union[bytes, memoryview]) -> BlockHeader:
+        """Deserialize a block header.
+        The header is read from the first 80 bytes of data, which may hold a whole block.
+
+        https://en.bitcoin.it/wiki/Protocol_documentation#Block_Headers
+
+        :param data: the raw bytes to deserialize.
+        """
+        return BlockHeader(*HEADER.unpack_from(data), raw=data[: HEADER.size])
+
+
+class Block:
+    """Represent a block.
+    The header fields and hash are exposed on the block for convenience.
+    """
+
+    __slots__ = ("header", "payload", "_transactions")
+
+    def __init__(self, header, payload):
+        """Constructor.
+
+        :param header: the block header.
+        :type header: BlockHeader.
+        :param payload: the serialized data following the header: the transaction count then the transactions.
+        """
+        self.header = header
         self.payload = payload
+        self._transactions = None
+
+    @property
+    def transactions(self) -> TransactionList:
+        """The transactions of the block, decoded on demand.
+        """
+        if self._transactions is None:
+            self._transactions = TransactionList(self.payload)
+        return self._transactions
+
+    @property
+    def transaction_count(self) -> int:
+        """The number of transactions in the block.
+        """
+        return len(self.transactions)
+
+    @property
+    def coinbase(self) -> Transaction:
+        """The coinbase transaction, which is always the first transaction of the block.
+        """
+        return self.transactions[0]
+
+    @property
+    def hash(self):
+        """The hash of the block header.
+        """
+        return self.header.hash
+
+    @property
+    def version(self):
+        """The version of the block.
+        """
+        return self.header.version
+
+    @property
+    def prev_block(self):
+        """The hash of the previous block.
+        """
+        return self.header.prev_block
+
+    @property
+    def merkle_root(self):
+        """The merkle root of the block transactions.
+        """
+        return self.header.merkle_root
+
+    @property
+    def timestamp(self):
+        """The timestamp of the block.
+        """
+        return self.header.timestamp
+
+    @property
+    def bits(self):
+        """The compact form of the block target.
+        """
+        return self.header.bits
+
+    @property
+    def nonce(self):
+        """The nonce of the block.
+        """
+        return self.header.nonce
 
     @staticmethod
-    def deserialize(data: bytes) -> Block:
+    def deserialize(data: Union[bytes, memoryview]) -> Block:
         """Deserialize block data.
+        Only the header fields are copied. The payload is a slice of data, so passing a memoryview
+        keeps the payload a view into the underlying buffer.
 
         https://en.bitcoin.it/wiki/Protocol_documentation#Block_Headers
 
         :param data: the raw bytes to deserialize.
         """
-        header = data[:80]
-        payload = data[81:]
-        version = int.from_bytes(header[:4], byteorder="little")
-        prev_block = header[4:36]
-        merkle_root = header[36:68]
-        timestamp = int.from_bytes(header[-12:-8], byteorder="little")
-        bits = int.from_bytes(header[-8:-4], byteorder="little")
-        nonce = int.from_bytes(header[-4:], byteorder="little")
-        block = Block(version, prev_block, merkle_root, timestamp, bits, nonce, payload)
+        header = BlockHeader.deserialize(data)
+        payload = data[HEADER.size :]
+        block = Block(header, payload)
         return block
+
+
+class HeaderTable:
+    """Store block headers contiguously with a fixed 80 bytes stride.
+    Holding the whole header chain costs about 80 bytes per header. A BlockHeader is only built
+    when a header is accessed by index.
+    The buffer can be decoded in one shot with blockchain.headers.decode.
+    Hashes are computed on demand and cached in a second buffer with a 32 bytes stride.
+    """
+
+    __slots__ = ("_data", "_hashes")
+
+    def __init__(self, data: bytearray = None):
+        """Constructor.
+
+        :param data: concatenated serialized headers to initialize the table with.
+        """
+        if data is not None and len(data) % HEADER.size:
+            raise ValueError(f"Data size is not a multiple of the header size: {len(data)}.")
+        self._data = bytearray() if data is None else bytearray(data)
+        self._hashes = bytearray()
+
+    def append(self, header: Union[bytes, memoryview, BlockHeader]):
+        """Append a header to the table.
+
+        :param header: the header or serialized data starting with a header (e.g. a whole block).
+        """
+        if isinstance(header, BlockHeader):
+            header = header.raw
+        if len(header) < HEADER.size:
+            raise ValueError(f"Header is too short: {len(header)} bytes.")
+        self._data += header[: HEADER.size]
+
+    def raw(self, index: int) -> bytes:
+        """Return the serialized header at index.
+
+        :param index: the position of the header, negative values count from the end.
+        """
+        start = self._position(index) * HEADER.size
+        return bytes(self._data[start : start + HEADER.size])
+
+    def hash(self, index: int) -> bytes:
+        """Return the hash of the header at index.
+
+        :param index: the position of the header, negative values count from the end.
+        """
+        start = self._position(index) * DIGEST_SIZE
+        if start >= len(self._hashes):
+            self.hashes()
+        return bytes(self._hashes[start : start + DIGEST_SIZE])
+
+    def hashes(self, workers: int = None) -> memoryview:
+        """Hash the headers that were not hashed yet and return all the hashes.
+
+        :param workers: the number of threads to hash with, see blockchain.hashing.hash_many.
+        :returns: a read-only view over the concatenated 32 bytes hashes, in the order of the headers.
+        New headers cannot be hashed while the view is alive.
+        """
+        hashed = len(self._hashes) // DIGEST_SIZE
+        if hashed < len(self):
+            with memoryview(self._data) as view:
+                buffers = [view[i * HEADER.size : (i + 1) * HEADER.size] for i in range(hashed, len(self))]
+                try:
+                    self._hashes += b"".join(hash_many(buffers, workers=workers))
+                finally:
+                    # the views export the data, which could not be resized while they are alive.
+                    for buffer in buffers:
+                        buffer.release()
+        return memoryview(self._hashes).toreadonly()
+
+    @property
+    def buffer(self) -> memoryview:
+        """A read-only view over the concatenated headers.
+        The table cannot grow while the view is alive.
+        """
+        return memoryview(self._data).toreadonly()
+
+    @property
+    def nbytes(self) -> int:
+        """The size in bytes of the stored headers.
+        """
+        return len(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data) // HEADER.size
+
+    def _position(self, index: int) -> int:
+        """Return the position of the header at index, which may be negative.
+        """
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("header table index out of range")
+        return index
+
+    def __getitem__(self, index: int) -> BlockHeader:
+        header = BlockHeader.deserialize(self.raw(index))
+        if self._position(index) * DIGEST_SIZE < len(self._hashes):
+            header._hash = self.hash(index)
+        return header
+
+    def __iter__(self) -> Iterator[BlockHeader]:
+        for index in range(len(self)):
+            yield self[index]
@@ -0,0 +1,232 @@
+"""Define the in-memory index linking blocks into a chain.
+
+blk*.dat files store blocks in the order they were received, not in chain order: a block may be written
+before its parent. The index links each block to its parent as blocks are streamed out of the files and
+assigns heights from the genesis block in a single pass. Blocks whose parent has not been seen yet are
+buffered as orphans until the parent shows up.
+
+The index also accumulates the chainwork of each block (the total work of the chain ending with the block)
+and keeps track of the best tip, the block with the most chainwork. When the best tip moves to a block
+that does not descend from the previous tip, the chain was reorganized: blocks between the fork point and
+the previous tip are stale.
+https://en.bitcoin.it/wiki/Chain_Reorganization
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from blockchain import ingest, parser
+from blockchain.block import BlockHeader
+from blockchain.difficulty import work
+
+# the previous block hash of the genesis block.
+NULL_HASH = bytes(32)
+
+# the default maximum number of orphans buffered by the index.
+# bitcoind downloads blocks within a window of 1024 blocks ahead of the tip, which bounds how far
+# a block can be written before its parent in practice.
+MAX_ORPHANS = 100000
+
+
+class IndexEntry:
+    """Represent the location of a block and its position in the chain.
+    """
+
+    __slots__ = ("hash", "file", "offset", "prev_block", "bits", "height", "chainwork")
+
+    def __init__(self, hash_, file, offset, prev_block, bits, height=None, chainwork=None):
+        """Constructor.
+
+        :param hash_: the hash of the block, in internal byte order.
+        :param file: the number of the blk*.dat file holding the block.
+        :param offset: the offset of the serialized block in the file.
+        :param prev_block: the hash of the parent block.
+        :param bits: the compact form of the block target.
+        :param height: the distance to the genesis block, None until the block is connected.
+        :param chainwork: the total work of the chain ending with the block, None until the block is connected.
+        """
+        self.hash = hash_
+        self.file = file
+        self.offset = offset
+        self.prev_block = prev_block
+        self.bits = bits
+        self.height = height
+        self.chainwork = chainwork
+
+
+class Reorg(NamedTuple):
+    """Represent a change of the best tip to a block that does not descend from the previous tip.
+    """
+
+    old_tip: bytes
+    new_tip: bytes
+    fork: Optional[bytes]
+    depth: int
+
+
+class ChainIndex:
+    """Index blocks by hash and link them to their parent.
+    """
+
+    def __init__(self, max_orphans: int = MAX_ORPHANS):
+        """Constructor.
+
+        :param max_orphans: the maximum number of orphans to buffer. The oldest orphan is dropped when the limit is reached.
+        """
+        self.max_orphans = max_orphans
+        self.dropped = 0
+        self.tip: Optional[IndexEntry] = None
+        self.reorgs: List[Reorg] = []
+        self._entries: Dict[bytes, IndexEntry] = {}
+        self._orphans: Dict[bytes, IndexEntry] = OrderedDict()
+        self._children: Dict[bytes, List[bytes]] = {}
+
+    def add(self, header: BlockHeader, file: int, offset: int) -> List[IndexEntry]:
+        """Add a block to the index.
+
+        :param header: the header of the block.
+        :param file: the number of the blk*.dat file holding the block.
+        :param offset: the offset of the serialized block in the file.
+        :returns: the entries connected to the chain by this block, parents first. The list is empty if the block
+        is an orphan or was already indexed.
+        """
+        entry = IndexEntry(bytes(header.hash), file, offset, bytes(header.prev_block), header.bits)
+        if entry.hash in self._entries or entry.hash in self._orphans:
+            return []
+        if entry.prev_block == NULL_HASH:
+            parent = None
+        elif entry.prev_block in self._entries:
+            parent = self._entries[entry.prev_block]
+        else:
+            self._buffer(entry)
+            return []
+        return self._connect(entry, parent)
+
+    def get(self, hash_: bytes) -> Optional[IndexEntry]:
+        """Return the entry of a connected block.
+
+        :param hash_: the hash of the block, in internal byte order.
+        """
+        return self._entries.get(hash_)
+
+    def main_chain(self) -> List[IndexEntry]:
+        """Return the blocks of the best chain, from the genesis block to the best tip.
+        """
+        chain = []
+        entry = self.tip
+        while entry is not None:
+            chain.append(entry)
+            entry = self._entries.get(entry.prev_block)
+        chain.reverse()
+        return chain
+
+    @property
+    def orphan_count(self) -> int:
+        """The number of blocks waiting for their parent.
+        """
+        return len(self._orphans)
+
+    def _buffer(self, entry: IndexEntry):
+        """Buffer an orphan until its parent is connected.
+        """
+        if len(self._orphans) >= self.max_orphans:
+            _, evicted = self._orphans.popitem(last=False)
+            siblings = self._children[evicted.prev_block]
+            siblings.remove(evicted.hash)
+            if not siblings:
+                del self._children[evicted.prev_block]
+            self.dropped += 1
+        self._orphans[entry.hash] = entry
+        self._children.setdefault(entry.prev_block, []).append(entry.hash)
+
+    def _connect(self, entry: IndexEntry, parent: Optional[IndexEntry]) -> List[IndexEntry]:
+        """Connect a block and the orphans descending from it.
+        """
+        connected = []
+        stack = [(entry, parent)]
+        while stack:
+            entry, parent = stack.pop()
+            if parent is None:
+                entry.height, entry.chainwork = 0, work(entry.bits)
+            else:
+                entry.height, entry.chainwork = parent.height + 1, parent.chainwork + work(entry.bits)
+            self._entries[entry.hash] = entry
+            connected.append(entry)
+            self._update_tip(entry)
+            for child in self._children.pop(entry.hash, ()):
+                stack.append((self._orphans.pop(child), entry))
+        return connected
+
+    def _update_tip(self, entry: IndexEntry):
+        """Make the block the best tip if it has more chainwork, and detect reorganizations.
+        On equal chainwork, the first block seen stays the tip like bitcoind does.
+        """
+        tip = self.tip
+        if tip is not None and entry.chainwork <= tip.chainwork:
+            return
+        self.tip = entry
+        if tip is None or entry.prev_block == tip.hash:
+            return
+        # walk both branches back to their common ancestor.
+        old, new = tip, entry
+        while old.hash != new.hash:
+            if old.height >= new.height:
+                old = self._entries.get(old.prev_block)
+            else:
+                new = self._entries.get(new.prev_block)
+            if old is None or new is None:
+                # the branches start from different genesis blocks.
+                self.reorgs.append(Reorg(tip.hash, entry.hash, None, tip.height + 1))
+                return
+        self.reorgs.append(Reorg(tip.hash, entry.hash, old.hash, tip.height - old.height))
+
+    def __contains__(self, hash_: bytes) -> bool:
+        return hash_ in self._entries
+
+    def __getitem__(self, hash_: bytes) -> IndexEntry:
+        return self._entries[hash_]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def index_file(index: ChainIndex, path: str) -> List[IndexEntry]:
+    """Stream the blocks of a blk*.dat file into the index.
+    Only the headers are decoded.
+
+    :param index: the index to fill.
+    :param path: the path to the blk*.dat file.
+    :returns: the entries connected while reading the file, parents first.
+    """
+    number = ingest.file_number(path)
+    connected = []
+    with open(path, "rb") as f:
+        for offset, data in parser.read(f):
+            connected.extend(index.add(BlockHeader.deserialize(data), number, offset))
+    return connected
+
+
+def build(paths: Iterable[str], max_orphans: int = MAX_ORPHANS) -> ChainIndex:
+    """Build the index of the blocks stored in blk*.dat files.
+
+    :param paths: the paths to the blk*.dat files, in file number order.
+    :param max_orphans: the maximum number of orphans to buffer.
+    """
+    index = ChainIndex(max_orphans=max_orphans)
+    for path in paths:
+        index_file(index, path)
+    return index
+
+
+def build_directory(directory: str, workers: int = None, max_orphans: int = MAX_ORPHANS) -> ChainIndex:
+    """Build the index of the blocks of a blocks/ directory, parsing the files across a pool of worker processes.
+    Only the block headers are sent back from the workers. Use ChainIndex.main_chain to select the blocks to
+    load: stale blocks and forks are not part of it.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param workers: the number of worker processes, defaults to the number of cpus.
+    :param max_orphans: the maximum number of orphans to buffer.
+    """
+    index = ChainIndex(max_orphans=max_orphans)
+    for path, offset, summary in ingest.ingest(directory, workers=workers):
+        index.add(BlockHeader.deserialize(summary.header), ingest.file_number(path), offset)
+    return index
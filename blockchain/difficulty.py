@@ -0,0 +1,39 @@
+"""Define methods to decode the difficulty of blocks.
+
+The target of a block is stored in its header in a compact form (nbits).
+https://en.bitcoin.it/wiki/Difficulty#How_is_difficulty_stored_in_blocks.3F
+
+The target only changes every 2016 blocks, so the whole chain has a few hundred distinct nbits values:
+decoded values are cached by nbits.
+"""
+from functools import lru_cache
+
+# the number of distinct nbits values to cache, which is more than the chain has.
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def target(bits: int) -> int:
+    """Derive the target from the compact form stored in the block header.
+    N = mantissa * 256^(exponent - 3), the sign bit is ignored as targets are never negative.
+
+    https://github.com/bitcoin/bitcoin/blob/master/src/arith_uint256.cpp (SetCompact)
+
+    :param bits: the compact form of the target, as an unsigned 32 bits integer.
+    """
+    exponent = bits >> 24
+    mantissa = bits & 0x007FFFFF
+    if exponent <= 3:
+        return mantissa >> (8 * (3 - exponent))
+    return mantissa << (8 * (exponent - 3))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def work(bits: int) -> int:
+    """Compute the expected number of hashes needed to find a block at the target, 2^256 / (target + 1).
+
+    https://github.com/bitcoin/bitcoin/blob/master/src/chain.cpp (GetBlockProof)
+
+    :param bits: the compact form of the target.
+    """
+    return (1 << 256) // (target(bits) + 1)
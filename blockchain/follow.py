@@ -0,0 +1,171 @@
+"""Define methods to follow the blk*.dat files written by a running bitcoind.
+
+bitcoind appends blocks to the last blk*.dat file and moves on to the next file once it is full.
+Following the files means reading blocks from the end of the last block already parsed, and moving to the
+next file when it appears. The position reached in each file is persisted as a checkpoint so that a restart
+resumes where it stopped without rescanning.
+
+Files are polled: the standard library has no portable file change notification and a poll of
+a fraction of a second keeps the lag between a block write and its parsing below a second.
+"""
+import json
+import os
+import struct
+import time
+from typing import Dict, Generator, Tuple
+
+from blockchain import ingest, merkle
+from blockchain.block import HEADER, Block
+from blockchain.parser import INDEX_HEADER, MAX_BLOCK_SIZE, MESSAGE_START, NETWORK_MAGIC
+from blockchain.transaction import TransactionList, skip
+
+# the number of seconds to wait before looking for new blocks.
+POLL_INTERVAL = 0.25
+
+# the number of blocks parsed between two writes of the checkpoints.
+CHECKPOINT_EVERY = 100
+
+
+class Checkpoints:
+    """Persist the offset following the last block parsed in each blk*.dat file.
+    """
+
+    def __init__(self, path: str):
+        """Constructor.
+
+        :param path: the path to the checkpoint file, which is created on the first save.
+        """
+        self.path = path
+        self._offsets: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._offsets = json.load(f)
+
+    def get(self, name: str) -> int:
+        """Return the checkpoint of a file.
+
+        :param name: the name of the blk*.dat file.
+        :returns: the offset following the last block parsed, 0 if the file was never parsed.
+        """
+        return self._offsets.get(name, 0)
+
+    def set(self, name: str, offset: int):
+        """Update the checkpoint of a file. The checkpoint is persisted on the next save.
+
+        :param name: the name of the blk*.dat file.
+        :param offset: the offset following the last block parsed.
+        """
+        self._offsets[name] = offset
+
+    def last(self) -> str:
+        """Return the name of the last file with a checkpoint, None if there is none.
+        """
+        if not self._offsets:
+            return None
+        return max(self._offsets, key=ingest.file_number)
+
+    def save(self):
+        """Persist the checkpoints atomically.
+        """
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self._offsets, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+
+def follow(
+    directory: str,
+    checkpoints: Checkpoints,
+    poll_interval: float = POLL_INTERVAL,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+    magic: bytes = NETWORK_MAGIC,
+) -> Generator[Tuple[str, int, bytes], None, None]:
+    """Yield the blocks written to a blocks/ directory, forever.
+    A block is checkpointed once the consumer asks for the next one, so a block is yielded again after a restart
+    if its processing did not complete.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param checkpoints: the checkpoints to resume from and to update.
+    :param poll_interval: the number of seconds to wait when no new block is available.
+    :param checkpoint_every: the number of blocks between two saves of the checkpoints.
+    :param magic: the network magic that starts each index header.
+    :returns: a generator yielding the path, the offset of the serialized block data and the data itself.
+    """
+    last = checkpoints.last()
+    if last is not None:
+        number = ingest.file_number(last)
+    else:
+        files = ingest.list_files(directory)
+        number = ingest.file_number(files[0]) if files else 0
+    pending = 0
+    try:
+        while True:
+            name = f"blk{number:05d}.dat"
+            path = os.path.join(directory, name)
+            offset = checkpoints.get(name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    while True:
+                        data = _read_block(f, offset, magic)
+                        if data is None:
+                            break
+                        yield path, offset + INDEX_HEADER, data
+                        offset += INDEX_HEADER + len(data)
+                        checkpoints.set(name, offset)
+                        pending += 1
+                        if pending >= checkpoint_every:
+                            checkpoints.save()
+                            pending = 0
+            # bitcoind only moves to the next file once the current one is complete.
+            if os.path.exists(os.path.join(directory, f"blk{number + 1:05d}.dat")):
+                number += 1
+                continue
+            if pending:
+                checkpoints.save()
+                pending = 0
+            time.sleep(poll_interval)
+    finally:
+        if pending:
+            checkpoints.save()
+
+
+def _read_block(f, offset: int, magic: bytes) -> bytes:
+    """Read the block written at offset.
+
+    :returns: the serialized block, None if no complete block is written at offset yet.
+    """
+    f.seek(offset)
+    header = f.read(INDEX_HEADER)
+    if len(header) < INDEX_HEADER or header[:MESSAGE_START] != magic:
+        return None
+    size = int.from_bytes(header[MESSAGE_START:], byteorder="little", signed=True)
+    if not 0 < size <= MAX_BLOCK_SIZE:
+        return None
+    data = f.read(size)
+    if len(data) < size or not _complete(data):
+        return None
+    return data
+
+
+def _complete(data: bytes) -> bool:
+    """Check that a block is fully written.
+    Files are preallocated with zeros, so a block being written has the right size but may not be fully written yet.
+    The last transaction must end with the block, and the transactions must match the merkle root of the header:
+    a tail still filled with zeros can decode to transactions of the right size.
+    """
+    with memoryview(data) as view:
+        payload = view[HEADER.size :]
+        try:
+            transactions = TransactionList(payload)
+            if skip(payload, transactions.offset(-1)) != len(payload):
+                return False
+        except (IndexError, struct.error):
+            return False
+        finally:
+            payload.release()
+    try:
+        return merkle.verify(Block.deserialize(data))
+    except (IndexError, struct.error):
+        return False
@@ -0,0 +1,52 @@
+"""Define hashing helpers.
+
+Bitcoin hashes block headers and transactions with SHA256 applied twice.
+https://en.bitcoin.it/wiki/Protocol_documentation#Hashes
+
+Digests are returned in internal byte order, which is the order used by prev_block and merkle_root.
+Block explorers display them reversed.
+
+hashlib only releases the GIL for buffers of at least 2 KiB, so hashing across threads pays off for
+transactions but not for 80 bytes headers, which are hashed in the calling thread unless workers are requested.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Sequence, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# the number of buffers hashed by each task submitted to the thread pool.
+CHUNK_SIZE = 4096
+
+
+def double_sha256(data: Buffer) -> bytes:
+    """Hash data with SHA256 applied twice.
+
+    :param data: the data to hash.
+    :returns: the 32 bytes digest.
+    """
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def hash_many(buffers: Iterable[Buffer], workers: int = None) -> List[bytes]:
+    """Hash many buffers with double SHA256.
+
+    :param buffers: the data to hash.
+    :param workers: the number of threads to hash with. Buffers are hashed in the calling thread if not provided.
+    :returns: the digests, in the order of buffers.
+    """
+    if not workers:
+        return [double_sha256(data) for data in buffers]
+    buffers = buffers if isinstance(buffers, Sequence) else list(buffers)
+    chunks = [buffers[i : i + CHUNK_SIZE] for i in range(0, len(buffers), CHUNK_SIZE)]
+    digests = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk in executor.map(_hash_chunk, chunks):
+            digests.extend(chunk)
+    return digests
+
+
+def _hash_chunk(buffers: Sequence[Buffer]) -> List[bytes]:
+    """Hash a chunk of buffers in a worker thread.
+    """
+    return [double_sha256(data) for data in buffers]
@@ -0,0 +1,50 @@
+"""Define methods to decode block headers in batches.
+
+Header-only workloads (analytics over the whole header chain) do not need a Python object per block.
+Headers are fixed size, so many concatenated headers can be viewed as a NumPy structured array
+without copying nor looping over them in Python.
+https://en.bitcoin.it/wiki/Protocol_documentation#Block_Headers
+"""
+from typing import Iterable, Union
+
+import numpy as np
+
+from blockchain.block import HEADER
+
+# the layout of a block header as a structured dtype. Fields are little endian and unaligned,
+# which matches the serialized header byte for byte.
+HEADER_DTYPE = np.dtype(
+    [
+        ("version", "<u4"),
+        ("prev_block", "u1", (32,)),
+        ("merkle_root", "u1", (32,)),
+        ("timestamp", "<u4"),
+        ("bits", "<u4"),
+        ("nonce", "<u4"),
+    ]
+)
+assert HEADER_DTYPE.itemsize == HEADER.size
+
+
+def decode(buffer: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Decode concatenated block headers.
+    The returned array is a view over the buffer: the buffer must outlive the array and is not copied.
+
+    :param buffer: the concatenated 80 bytes headers.
+    :returns: a structured array with one record per header.
+    """
+    if len(buffer) % HEADER_DTYPE.itemsize:
+        raise ValueError(f"Buffer size is not a multiple of the header size: {len(buffer)}.")
+    return np.frombuffer(buffer, dtype=HEADER_DTYPE)
+
+
+def concatenate(blocks: Iterable[Union[bytes, memoryview]]) -> bytearray:
+    """Concatenate the headers of serialized blocks into a single buffer suitable for decode.
+
+    :param blocks: the serialized blocks, as yielded by the parser without the offsets.
+    :returns: the concatenated headers.
+    """
+    buffer = bytearray()
+    for data in blocks:
+        buffer += data[: HEADER.size]
+    return buffer
@@ -0,0 +1,130 @@
+"""Define methods to parse a whole bitcoind blocks/ directory using a pool of worker processes.
+
+Each blk*.dat file is parsed by a single worker, files are distributed across the pool and the results
+are merged back in file order, then offset order, so that the output does not depend on the scheduling.
+The number of files being parsed or waiting to be consumed is bounded, which applies backpressure to the
+workers when the consumer is slower than the pool.
+
+Results are pickled back from the worker processes: by default each block is reduced to its header and
+counts, handlers needing more of the block should return only what they need too.
+"""
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Generator, Iterable, List, NamedTuple, Tuple
+
+from blockchain import parser
+from blockchain.block import HEADER, Block
+
+# the name of the files written by bitcoind in the blocks/ directory.
+# https://en.bitcoin.it/wiki/Bitcoin_Core_0.11_(ch_2):_Data_Storage#Raw_Block_data_.28blk.2A.dat.29
+FILENAME = re.compile(r"^(blk|rev)(\d{5})\.dat$")
+
+
+class BlockSummary(NamedTuple):
+    """The result of the default handler for a block.
+    """
+
+    header: bytes
+    size: int
+    transaction_count: int
+
+
+def summarize(data: bytes) -> BlockSummary:
+    """Reduce serialized block data to its header and counts, which are cheap to send back from a worker.
+
+    :param data: the serialized block.
+    """
+    return BlockSummary(bytes(data[: HEADER.size]), len(data), Block.deserialize(data).transaction_count)
+
+
+def list_files(directory: str, prefix: str = "blk") -> List[str]:
+    """List the data files of a blocks/ directory, ordered by file number.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param prefix: the prefix of the files to list, either blk or rev.
+    :returns: the paths to the files.
+    """
+    numbered = []
+    for name in os.listdir(directory):
+        match = FILENAME.match(name)
+        if match and match.group(1) == prefix:
+            numbered.append((int(match.group(2)), os.path.join(directory, name)))
+    return [path for _, path in sorted(numbered)]
+
+
+def file_number(path: str) -> int:
+    """Return the number of a blk*.dat or rev*.dat file.
+
+    :param path: the path to the file.
+    """
+    return int(FILENAME.match(os.path.basename(path)).group(2))
+
+
+def parse_file(path: str, handler: Callable[[bytes], Any] = summarize) -> List[Tuple[int, Any]]:
+    """Parse every block of a blk*.dat file.
+    This runs in the worker processes: the handler and its result must be picklable.
+
+    :param path: the path to the blk*.dat file.
+    :param handler: the function applied to the serialized data of each block, summarize by default.
+    :returns: the offset of each block with the result of the handler.
+    """
+    with open(path, "rb") as f:
+        return [(offset, handler(data)) for offset, data in parser.read(f)]
+
+
+def map_files(
+    func: Callable[[str], Any], paths: Iterable[str], workers: int = None, max_pending: int = None
+) -> Generator[Tuple[str, Any], None, None]:
+    """Apply a function to each file across a pool of worker processes.
+
+    :param func: the function to apply. It must be picklable, i.e. defined at the top level of a module.
+    :param paths: the paths to the files.
+    :param workers: the number of worker processes, defaults to the number of cpus.
+    :param max_pending: the maximum number of files submitted to the pool but not yet consumed,
+    defaults to twice the number of workers.
+    :returns: a generator yielding each path with the result of the function, in the order of paths.
+    """
+    workers = workers or os.cpu_count()
+    max_pending = max_pending or 2 * workers
+    pending: Deque = deque()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for path in paths:
+            if len(pending) >= max_pending:
+                done, future = pending.popleft()
+                yield done, future.result()
+            pending.append((path, executor.submit(func, path)))
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+    finally:
+        # the consumer may stop early: do not parse files whose result will never be read.
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def ingest(
+    directory: str,
+    handler: Callable[[bytes], Any] = summarize,
+    workers: int = None,
+    max_pending: int = None,
+) -> Generator[Tuple[str, int, Any], None, None]:
+    """Parse every blk*.dat file of a blocks/ directory across a pool of worker processes.
+    Results are sent back from the workers: a handler that reduces each block to what is needed
+    keeps the inter-process traffic low.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param handler: the function applied to the serialized data of each block, summarize by default. It must be picklable.
+    :param workers: the number of worker processes, defaults to the number of cpus.
+    :param max_pending: the maximum number of files parsed ahead of the consumer.
+    :returns: a generator yielding the path, the block offset and the result of the handler,
+    ordered by file number then offset.
+    """
+    func = partial(parse_file, handler=handler)
+    for path, results in map_files(func, list_files(directory), workers=workers, max_pending=max_pending):
+        for offset, result in results:
+            yield path, offset, result
@@ -0,0 +1,173 @@
+"""Define the persistent index locating blocks in blk*.dat files.
+
+Similarly to the block index of bitcoind, the index maps a block hash to the number of the blk*.dat file
+holding the block, the offset of the serialized block in that file and its size.
+https://en.bitcoin.it/wiki/Bitcoin_Core_0.11_(ch_2):_Data_Storage#Block_index_.28leveldb.29
+
+The index is a hash table of fixed size records written to a single file, designed to be memory mapped:
+- 32 bytes: header (magic, format version, number of slots, number of entries)
+- number of slots * 48 bytes: records (block hash, file number, offset, size)
+
+The slot of a block is given by the first 8 bytes of its hash, which are uniformly distributed, and collisions
+are resolved by linear probing. Empty slots have a size of zero. A lookup reads a handful of records.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import BinaryIO, Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+from blockchain import ingest
+from blockchain.block import BlockHeader
+
+MAGIC = b"YBIX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQQ4x")
+RECORD = struct.Struct("<32sIQI")
+SLOT = struct.Struct("<Q")
+
+# the maximum ratio of used slots, which bounds the length of the probe sequences.
+LOAD_FACTOR = 0.5
+
+
+class Location(NamedTuple):
+    """Represent the location of a block.
+    """
+
+    file: int
+    offset: int
+    size: int
+
+
+def locate(data: Union[bytes, memoryview]) -> Tuple[bytes, int]:
+    """Return the hash and size of serialized block data.
+    This is meant to be used as an ingest handler.
+
+    :param data: the serialized block.
+    """
+    return BlockHeader.deserialize(data).hash, len(data)
+
+
+def write(path: str, entries: Iterable[Tuple[bytes, Location]]):
+    """Write an index file.
+    The file is written next to its final path then moved, so that readers never see a partial index.
+
+    :param path: the path to the index file.
+    :param entries: the hash and location of each block. Duplicated hashes keep the first location.
+    """
+    entries = list(entries)
+    slots = 1
+    while slots * LOAD_FACTOR < max(len(entries), 1):
+        slots *= 2
+    table = bytearray(HEADER.size + slots * RECORD.size)
+    count = 0
+    for hash_, location in entries:
+        slot = _probe(table, slots, hash_)
+        position = HEADER.size + slot * RECORD.size
+        if RECORD.unpack_from(table, position)[3]:
+            continue
+        RECORD.pack_into(table, position, hash_, location.file, location.offset, location.size)
+        count += 1
+    HEADER.pack_into(table, 0, MAGIC, FORMAT_VERSION, slots, count)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(table)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def build(directory: str, path: str, workers: int = None, max_pending: int = None):
+    """Build the index of the blocks of a blocks/ directory.
+    Headers are hashed across a pool of worker processes.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param path: the path to the index file.
+    :param workers: the number of worker processes, defaults to the number of cpus.
+    :param max_pending: the maximum number of files parsed ahead of the writer.
+    """
+    entries = (
+        (hash_, Location(ingest.file_number(blk), offset, size))
+        for blk, offset, (hash_, size) in ingest.ingest(directory, handler=locate, workers=workers, max_pending=max_pending)
+    )
+    write(path, entries)
+
+
+def _probe(table: Union[bytearray, mmap.mmap], slots: int, hash_: bytes) -> int:
+    """Return the slot holding the hash, or the empty slot where it would be inserted.
+    """
+    slot = SLOT.unpack_from(hash_)[0] & (slots - 1)
+    while True:
+        position = HEADER.size + slot * RECORD.size
+        if table[position : position + 32] == hash_ or not RECORD.unpack_from(table, position)[3]:
+            return slot
+        slot = (slot + 1) & (slots - 1)
+
+
+class LocationIndex:
+    """Read an index file to locate blocks and read them from the blk*.dat files.
+    """
+
+    def __init__(self, path: str, directory: str):
+        """Constructor.
+
+        :param path: the path to the index file.
+        :param directory: the bitcoind blocks/ directory holding the indexed blk*.dat files.
+        """
+        self.directory = directory
+        with open(path, "rb") as f:
+            self._table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._slots, self._count = HEADER.unpack_from(self._table)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._table.close()
+            raise ValueError(f"Not a block location index (version {FORMAT_VERSION}): {path}.")
+        self._files: Dict[int, BinaryIO] = {}
+
+    def get(self, hash_: bytes) -> Optional[Location]:
+        """Locate a block.
+
+        :param hash_: the hash of the block, in internal byte order.
+        :returns: the location of the block, None if the block is not indexed.
+        """
+        position = HEADER.size + _probe(self._table, self._slots, hash_) * RECORD.size
+        _, file, offset, size = RECORD.unpack_from(self._table, position)
+        if not size:
+            return None
+        return Location(file, offset, size)
+
+    def get_block(self, hash_: bytes) -> Optional[bytes]:
+        """Read a block from its blk*.dat file.
+
+        :param hash_: the hash of the block, in internal byte order.
+        :returns: the serialized block, None if the block is not indexed.
+        """
+        location = self.get(hash_)
+        if location is None:
+            return None
+        f = self._files.get(location.file)
+        if f is None:
+            f = open(os.path.join(self.directory, f"blk{location.file:05d}.dat"), "rb")
+            self._files[location.file] = f
+        f.seek(location.offset)
+        return f.read(location.size)
+
+    def close(self):
+        """Close the index and the blk*.dat files opened by get_block.
+        """
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        self._table.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, hash_: bytes) -> bool:
+        return self.get(hash_) is not None
+
+    def __enter__(self) -> LocationIndex:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
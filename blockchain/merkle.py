@@ -0,0 +1,96 @@
+"""Define methods to verify the merkle root of blocks.
+
+The merkle root commits to the transactions of a block: transaction ids are hashed in pairs, level by level,
+the last hash of a level being paired with itself when the level has an odd number of hashes.
+https://en.bitcoin.it/wiki/Protocol_documentation#Merkle_Trees
+"""
+from typing import Generator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from blockchain import ingest
+from blockchain.block import Block
+from blockchain.hashing import hash_many
+
+
+class Mismatch(NamedTuple):
+    """Represent a block whose merkle root does not match its transactions.
+    Hashes are in internal byte order.
+    """
+
+    path: str
+    offset: int
+    block_hash: bytes
+    expected: bytes
+    computed: bytes
+
+
+def merkle_root(hashes: Sequence[bytes], workers: int = None) -> bytes:
+    """Compute the merkle root of a list of transaction ids.
+    Each level is hashed as a single batch.
+
+    :param hashes: the transaction ids in block order.
+    :param workers: the number of threads to hash with, see blockchain.hashing.hash_many.
+    :returns: the merkle root.
+    """
+    if not hashes:
+        raise ValueError("Cannot compute the merkle root of an empty list of hashes.")
+    level = list(hashes)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = hash_many([level[i] + level[i + 1] for i in range(0, len(level), 2)], workers=workers)
+    return level[0]
+
+
+def transaction_ids(block: Block, workers: int = None) -> List[bytes]:
+    """Compute the transaction ids of a block.
+
+    :param block: the block.
+    :param workers: the number of threads to hash with. Transactions are large enough for hashlib to release the GIL.
+    :returns: the transaction ids in block order.
+    """
+    return hash_many([transaction.stripped for transaction in block.transactions], workers=workers)
+
+
+def compute(block: Block, workers: int = None) -> bytes:
+    """Compute the merkle root of a block from its transactions.
+
+    :param block: the block.
+    :param workers: the number of threads to hash with.
+    """
+    return merkle_root(transaction_ids(block, workers=workers))
+
+
+def verify(block: Block, workers: int = None) -> bool:
+    """Check that the merkle root of the block header matches its transactions.
+
+    :param block: the block.
+    :param workers: the number of threads to hash with.
+    """
+    return compute(block, workers=workers) == block.merkle_root
+
+
+def check(data: Union[bytes, memoryview]) -> Optional[Tuple[bytes, bytes, bytes]]:
+    """Check the merkle root of serialized block data.
+    This is meant to be used as an ingest handler: it only returns data for blocks that fail the check.
+
+    :param data: the serialized block.
+    :returns: None if the merkle root matches, otherwise the block hash, the expected and the computed merkle roots.
+    """
+    block = Block.deserialize(data)
+    computed = compute(block)
+    if computed == block.merkle_root:
+        return None
+    return block.hash, block.merkle_root, computed
+
+
+def verify_directory(directory: str, workers: int = None, max_pending: int = None) -> Generator[Mismatch, None, None]:
+    """Check the merkle root of every block of a blocks/ directory across a pool of worker processes.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param workers: the number of worker processes, defaults to the number of cpus.
+    :param max_pending: the maximum number of files checked ahead of the consumer.
+    :returns: a generator yielding the blocks that fail the check, ordered by file number then offset.
+    """
+    for path, offset, result in ingest.ingest(directory, handler=check, workers=workers, max_pending=max_pending):
+        if result is not None:
+            yield Mismatch(path, offset, *result)
@@ -18,9 +18,18 @@ However, only the magic number, size and serialized block data is written to dis
 This can be seen in the function WriteBlockToDisk: https://github.com/bitcoin/bitcoin/blob/master/src/validation.cpp
 The function writes an **index header** which consists of the message start and the size
 
+rev*.dat files hold the undo data of the blocks (the outputs spent by each block) with the same framing,
+except that each record is followed by a checksum.
+https://github.com/bitcoin/bitcoin/blob/master/src/validation.cpp (UndoWriteToDisk)
+
+bitcoind preallocates blk*.dat and rev*.dat files in chunks filled with zeros, so the end of a file is usually padding.
+Bytes that do not start with the network magic are skipped until the next magic is found.
+
 NB: the current state of the code assumes well formed data and does not validate anything.
 """
-from typing import BinaryIO, Generator
+import mmap
+import os
+from typing import BinaryIO, Generator, Tuple, Union
 
 from blockchain.block import Block
 
@@ -30,18 +39,137 @@ MESSAGE_COMMAND = 12
 MESSAGE_SIZE = 4
 MESSAGE_CHECKSUM = 4
 
+# the size in bytes of the index header written before each block.
+INDEX_HEADER = MESSAGE_START + MESSAGE_SIZE
+
+# the message start of the main network.
+# https://github.com/bitcoin/bitcoin/blob/master/src/chainparams.cpp
+NETWORK_MAGIC = bytes.fromhex("f9beb4d9")
+
+# blocks are at most 4M weight units, which bounds their serialized size.
+# A larger size means the magic matched stray bytes.
+MAX_BLOCK_SIZE = 4000000
+
+# the size in bytes of the checksum following each record of the rev*.dat files.
+UNDO_CHECKSUM = 32
+
+# the size in bytes of the reads issued against blk*.dat files.
+BUFFER_SIZE = 16 * 1024 * 1024
+
+
+def read(
+    file_: BinaryIO, magic: bytes = NETWORK_MAGIC, buffer_size: int = BUFFER_SIZE, trailer: int = 0
+) -> Generator[Tuple[int, bytes], None, None]:
+    """Read every block of the file, starting at its current position.
+    The file is consumed using large buffered reads. Padding and stray bytes between blocks are skipped by
+    scanning for the network magic. A truncated block at the end of the file ends the iteration.
+
+    :param file_: the blk*.dat file opened in binary mode.
+    :param magic: the network magic that starts each index header.
+    :param buffer_size: the size in bytes of each read.
+    :param trailer: the number of bytes following each record, which are yielded with the data.
+    :returns: a generator yielding the file offset of the serialized block data and the data itself.
+    """
+    base = file_.tell()
+    buffer = file_.read(buffer_size)
+    position = 0
+    eof = len(buffer) < buffer_size
+    while True:
+        start, size = _next_block(buffer, position, magic)
+        end = start + INDEX_HEADER + size + trailer
+        if start >= 0 and size >= 0 and end <= len(buffer):
+            yield base + start + INDEX_HEADER, buffer[start + INDEX_HEADER : end]
+            position = end
+            continue
+        if eof:
+            return
+        # keep the unconsumed tail of the buffer, which may hold the beginning of the next block.
+        keep = start if start >= 0 else max(position, len(buffer) - INDEX_HEADER + 1)
+        chunk = file_.read(max(buffer_size, end - len(buffer)))
+        eof = not chunk
+        base += keep
+        buffer = buffer[keep:] + chunk
+        position = 0
+
+
+def read_mmap(file_: BinaryIO, magic: bytes = NETWORK_MAGIC, trailer: int = 0) -> Generator[Tuple[int, memoryview], None, None]:
+    """Read every block of the file by mapping it in memory.
+    Blocks are yielded as memoryview slices into the mapping so that no block data is copied until it is accessed.
+    The views must be released (or garbage collected) for the mapping to be unmapped.
+
+    :param file_: the blk*.dat file opened in binary mode.
+    :param magic: the network magic that starts each index header.
+    :param trailer: the number of bytes following each record, which are yielded with the data.
+    :returns: a generator yielding the file offset of the serialized block data and a view over the data.
+    """
+    if os.fstat(file_.fileno()).st_size == 0:
+        return
+    mapped = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        position = 0
+        while True:
+            start, size = _next_block(mapped, position, magic)
+            end = start + INDEX_HEADER + size + trailer
+            if start < 0 or size < 0 or end > len(mapped):
+                return
+            yield start + INDEX_HEADER, view[start + INDEX_HEADER : end]
+            position = end
+    finally:
+        view.release()
+        try:
+            mapped.close()
+        except BufferError:
+            # views yielded to the caller are still alive: the mapping is closed once they are collected.
+            pass
+
+
+def read_undo(file_: BinaryIO, magic: bytes = NETWORK_MAGIC, buffer_size: int = BUFFER_SIZE) -> Generator[Tuple[int, bytes, bytes], None, None]:
+    """Read every undo record of a rev*.dat file, starting at its current position.
+
+    :param file_: the rev*.dat file opened in binary mode.
+    :param magic: the network magic that starts each index header.
+    :param buffer_size: the size in bytes of each read.
+    :returns: a generator yielding the file offset of the undo data, the data and its checksum.
+    """
+    for offset, data in read(file_, magic=magic, buffer_size=buffer_size, trailer=UNDO_CHECKSUM):
+        view = memoryview(data)
+        yield offset, view[:-UNDO_CHECKSUM], view[-UNDO_CHECKSUM:]
+
+
+def read_undo_mmap(file_: BinaryIO, magic: bytes = NETWORK_MAGIC) -> Generator[Tuple[int, memoryview, memoryview], None, None]:
+    """Read every undo record of a rev*.dat file by mapping it in memory.
+
+    :param file_: the rev*.dat file opened in binary mode.
+    :param magic: the network magic that starts each index header.
+    :returns: a generator yielding the file offset of the undo data and views over the data and its checksum.
+    """
+    for offset, data in read_mmap(file_, magic=magic, trailer=UNDO_CHECKSUM):
+        yield offset, data[:-UNDO_CHECKSUM], data[-UNDO_CHECKSUM:]
+
+
+def _next_block(buffer: Union[bytes, mmap.mmap], position: int, magic: bytes) -> Tuple[int, int]:
+    """Find the next index header in the buffer.
 
-def read(file_: BinaryIO) -> Generator[bytes, None, None]:
-    """Read the file at filename and parses it according to the block structure definition.
-    :returns: a generator yielding serialized block data.
+    :param buffer: the data to scan.
+    :param position: the position to start scanning from.
+    :param magic: the network magic that starts each index header.
+    :returns: the position of the index header and the size of the block. The position is -1 if no magic was found
+    and the size is -1 if the buffer ends before the size field.
     """
-    offset = MESSAGE_START + MESSAGE_SIZE
-    header = file_.read(offset)
-    size = int.from_bytes(header[MESSAGE_START:], byteorder="little", signed=True)
-    yield file_.read(size)
+    while True:
+        start = buffer.find(magic, position)
+        if start < 0:
+            return -1, -1
+        if start + INDEX_HEADER > len(buffer):
+            return start, -1
+        size = int.from_bytes(buffer[start + MESSAGE_START : start + INDEX_HEADER], byteorder="little", signed=True)
+        if 0 < size <= MAX_BLOCK_SIZE:
+            return start, size
+        position = start + 1
 
 
-def parse_block(data: bytes):
+def parse_block(data: Union[bytes, memoryview]):
     """Parse block data as obtained from the blk*.dat files.
     """
     return Block.deserialize(data)
@@ -0,0 +1,282 @@
+"""Define the transaction data structure.
+
+https://en.bitcoin.it/wiki/Protocol_documentation#tx
+Segregated witness transactions have a marker and a flag after the version, and the witness
+data of each input before the lock time.
+https://github.com/bitcoin/bips/blob/master/bip-0144.mediawiki
+
+Transactions are decoded lazily: finding where a transaction ends only requires walking the
+length prefixes, and inputs and outputs are only decoded when iterated.
+"""
+from __future__ import annotations
+
+import struct
+from typing import Iterator, List, NamedTuple, Tuple, Union
+
+from blockchain.hashing import double_sha256
+
+Buffer = Union[bytes, memoryview]
+
+UINT16 = struct.Struct("<H")
+UINT32 = struct.Struct("<I")
+UINT64 = struct.Struct("<Q")
+INT64 = struct.Struct("<q")
+
+# the size in bytes of a transaction outpoint (the hash and index of the spent output).
+OUTPOINT = 36
+# the size in bytes of fixed fields.
+VERSION = 4
+SEQUENCE = 4
+VALUE = 8
+LOCK_TIME = 4
+# the segwit marker and flag.
+SEGWIT_MARKER = 0x00
+SEGWIT_FLAG = 0x01
+
+
+def read_compact_size(data: Buffer, offset: int) -> Tuple[int, int]:
+    """Read a variable length integer.
+
+    https://en.bitcoin.it/wiki/Protocol_documentation#Variable_length_integer
+
+    :param data: the data to read from.
+    :param offset: the position of the integer in data.
+    :returns: the integer and the position following it.
+    """
+    first = data[offset]
+    if first < 0xFD:
+        return first, offset + 1
+    if first == 0xFD:
+        return UINT16.unpack_from(data, offset + 1)[0], offset + 3
+    if first == 0xFE:
+        return UINT32.unpack_from(data, offset + 1)[0], offset + 5
+    return UINT64.unpack_from(data, offset + 1)[0], offset + 9
+
+
+class TxInput(NamedTuple):
+    """Represent a transaction input.
+    """
+
+    prev_hash: Buffer
+    prev_index: int
+    script: Buffer
+    sequence: int
+
+
+class TxOutput(NamedTuple):
+    """Represent a transaction output.
+    """
+
+    value: int
+    script: Buffer
+
+
+class Transaction:
+    """Represent a transaction.
+    Only the fixed fields and the position of each section are decoded on deserialization.
+    """
+
+    __slots__ = (
+        "raw",
+        "version",
+        "segwit",
+        "input_count",
+        "output_count",
+        "lock_time",
+        "_inputs",
+        "_outputs",
+        "_witness",
+        "_txid",
+    )
+
+    def __init__(self, raw, version, segwit, input_count, output_count, lock_time, inputs, outputs, witness):
+        """Constructor.
+
+        :param raw: the serialized transaction.
+        :param inputs: the position of the first input in raw.
+        :param outputs: the position of the first output in raw.
+        :param witness: the position of the witness data in raw, which is also the end of the outputs.
+        """
+        self.raw = raw
+        self.version = version
+        self.segwit = segwit
+        self.input_count = input_count
+        self.output_count = output_count
+        self.lock_time = lock_time
+        self._inputs = inputs
+        self._outputs = outputs
+        self._witness = witness
+        self._txid = None
+
+    @property
+    def stripped(self) -> Buffer:
+        """The serialization of the transaction without the segwit marker, flag and witness data.
+        This is the serialization hashed into the transaction id.
+        """
+        if not self.segwit:
+            return self.raw
+        raw = self.raw
+        return b"".join((raw[:VERSION], raw[VERSION + 2 : self._witness], raw[-LOCK_TIME:]))
+
+    @property
+    def txid(self) -> bytes:
+        """The hash of the transaction, in internal byte order. It is computed once and cached.
+        """
+        if self._txid is None:
+            self._txid = double_sha256(self.stripped)
+        return self._txid
+
+    @property
+    def inputs(self) -> Iterator[TxInput]:
+        """Decode the inputs of the transaction.
+        """
+        data = self.raw
+        offset = self._inputs
+        for _ in range(self.input_count):
+            prev_hash = data[offset : offset + 32]
+            prev_index = UINT32.unpack_from(data, offset + 32)[0]
+            length, offset = read_compact_size(data, offset + OUTPOINT)
+            script = data[offset : offset + length]
+            offset += length
+            sequence = UINT32.unpack_from(data, offset)[0]
+            offset += SEQUENCE
+            yield TxInput(prev_hash, prev_index, script, sequence)
+
+    @property
+    def outputs(self) -> Iterator[TxOutput]:
+        """Decode the outputs of the transaction.
+        """
+        data = self.raw
+        offset = self._outputs
+        for _ in range(self.output_count):
+            value = INT64.unpack_from(data, offset)[0]
+            length, offset = read_compact_size(data, offset + VALUE)
+            yield TxOutput(value, data[offset : offset + length])
+            offset += length
+
+    @property
+    def witness(self) -> Iterator[List[Buffer]]:
+        """Decode the witness data of the transaction, as a list of items for each input.
+        """
+        if not self.segwit:
+            return
+        data = self.raw
+        offset = self._witness
+        for _ in range(self.input_count):
+            count, offset = read_compact_size(data, offset)
+            items = []
+            for _ in range(count):
+                length, offset = read_compact_size(data, offset)
+                items.append(data[offset : offset + length])
+                offset += length
+            yield items
+
+    @property
+    def is_coinbase(self) -> bool:
+        """Whether the transaction is a coinbase, i.e. has a single input spending the null outpoint.
+        """
+        if self.input_count != 1:
+            return False
+        return self.raw[self._inputs : self._inputs + OUTPOINT] == b"\x00" * 32 + b"\xff" * 4
+
+    @staticmethod
+    def deserialize(data: Buffer, offset: int = 0) -> Transaction:
+        """Deserialize a transaction.
+        The size of the transaction is the length of its raw attribute.
+
+        :param data: the data holding the transaction, e.g. a block payload.
+        :param offset: the position of the transaction in data.
+        """
+        end, segwit, input_count, inputs, output_count, outputs, witness = _scan(data, offset)
+        raw = data[offset:end]
+        version = UINT32.unpack_from(data, offset)[0]
+        lock_time = UINT32.unpack_from(data, end - LOCK_TIME)[0]
+        return Transaction(
+            raw, version, segwit, input_count, output_count, lock_time, inputs - offset, outputs - offset, witness - offset
+        )
+
+
+def skip(data: Buffer, offset: int) -> int:
+    """Find the end of a transaction without decoding it.
+
+    :param data: the data holding the transaction.
+    :param offset: the position of the transaction in data.
+    :returns: the position following the transaction.
+    """
+    return _scan(data, offset)[0]
+
+
+def _scan(data: Buffer, offset: int) -> Tuple[int, bool, int, int, int, int, int]:
+    """Walk the length prefixes of a transaction.
+
+    :returns: the end of the transaction, whether it is a segwit transaction, the input count, the position
+    of the first input, the output count, the position of the first output and the position of the witness data.
+    """
+    offset += VERSION
+    segwit = data[offset] == SEGWIT_MARKER and data[offset + 1] == SEGWIT_FLAG
+    if segwit:
+        offset += 2
+    input_count, offset = read_compact_size(data, offset)
+    inputs = offset
+    for _ in range(input_count):
+        length, offset = read_compact_size(data, offset + OUTPOINT)
+        offset += length + SEQUENCE
+    output_count, offset = read_compact_size(data, offset)
+    outputs = offset
+    for _ in range(output_count):
+        length, offset = read_compact_size(data, offset + VALUE)
+        offset += length
+    witness = offset
+    if segwit:
+        for _ in range(input_count):
+            count, offset = read_compact_size(data, offset)
+            for _ in range(count):
+                length, offset = read_compact_size(data, offset)
+                offset += length
+    return offset + LOCK_TIME, segwit, input_count, inputs, output_count, outputs, witness
+
+
+class TransactionList:
+    """Lazy sequence over the transactions of a block payload.
+    The length only decodes the transaction count. Indexing walks the length prefixes of the preceding
+    transactions without building them, and remembers where each transaction starts.
+    """
+
+    __slots__ = ("_data", "_count", "_offsets")
+
+    def __init__(self, payload: Buffer):
+        """Constructor.
+
+        :param payload: the block data following the header: the transaction count then the transactions.
+        """
+        self._data = payload
+        self._count, start = read_compact_size(payload, 0)
+        self._offsets = [start]
+
+    def offset(self, index: int) -> int:
+        """Return the position of the transaction at index in the payload.
+
+        :param index: the position of the transaction in the block.
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("transaction index out of range")
+        while len(self._offsets) <= index:
+            self._offsets.append(skip(self._data, self._offsets[-1]))
+        return self._offsets[index]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Transaction:
+        return Transaction.deserialize(self._data, self.offset(index))
+
+    def __iter__(self) -> Iterator[Transaction]:
+        offset = self._offsets[0]
+        for index in range(self._count):
+            transaction = Transaction.deserialize(self._data, offset)
+            offset += len(transaction.raw)
+            if index + 1 == len(self._offsets) and index + 1 < self._count:
+                self._offsets.append(offset)
+            yield transaction
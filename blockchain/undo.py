@@ -0,0 +1,178 @@
+"""Define methods to decode the undo data of rev*.dat files.
+
+When bitcoind connects a block, it writes the outputs spent by the block to the rev*.dat file with the same
+number as the blk*.dat file holding the block. Reading the undo data gives the value of every input without
+rebuilding the set of unspent outputs.
+https://github.com/bitcoin/bitcoin/blob/master/src/undo.h
+
+The undo data of a block is a list with one entry per non coinbase transaction, each entry listing the spent
+outputs (coins) in input order. Coins are serialized with bitcoind's own variable length integers and compressed
+amounts and scripts.
+https://github.com/bitcoin/bitcoin/blob/master/src/compressor.h
+
+Undo records are written in the order blocks are connected, which differs from the order of the blocks in the
+blk*.dat file. Each record is followed by a checksum committing to the hash of the parent block, which pairs
+it with its block.
+"""
+import os
+from typing import Dict, Generator, List, NamedTuple, Tuple, Union
+
+from blockchain import ingest, parser
+from blockchain.block import Block
+from blockchain.hashing import double_sha256
+from blockchain.transaction import read_compact_size
+
+Buffer = Union[bytes, memoryview]
+
+# the size of the special scripts of the script compression, indexed by their type.
+SPECIAL_SCRIPT_SIZES = (20, 20, 32, 32, 32, 32)
+
+
+class BlockAmounts(NamedTuple):
+    """Represent the amounts of a block computed from its undo data, in satoshis.
+    The input and output only account for the non coinbase transactions.
+    """
+
+    hash: bytes
+    input: int
+    output: int
+    transaction_fee: int
+
+
+def read_varint(data: Buffer, offset: int) -> Tuple[int, int]:
+    """Read a variable length integer as serialized by bitcoind's VARINT (not CompactSize).
+
+    https://github.com/bitcoin/bitcoin/blob/master/src/serialize.h (ReadVarInt)
+
+    :param data: the data to read from.
+    :param offset: the position of the integer in data.
+    :returns: the integer and the position following it.
+    """
+    value = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, offset
+        value += 1
+
+
+def decompress_amount(x: int) -> int:
+    """Decompress an amount.
+
+    https://github.com/bitcoin/bitcoin/blob/master/src/compressor.cpp (DecompressAmount)
+
+    :param x: the compressed amount.
+    :returns: the amount in satoshis.
+    """
+    if x == 0:
+        return 0
+    x -= 1
+    exponent = x % 10
+    x //= 10
+    if exponent < 9:
+        digit = (x % 9) + 1
+        x //= 9
+        n = x * 10 + digit
+    else:
+        n = x + 1
+    return n * 10 ** exponent
+
+
+def parse(data: Buffer) -> List[List[int]]:
+    """Decode the undo data of a block.
+
+    :param data: the undo data, without the checksum.
+    :returns: the values of the spent outputs, for each non coinbase transaction.
+    """
+    count, offset = read_compact_size(data, 0)
+    spent = []
+    for _ in range(count):
+        coins, offset = read_compact_size(data, offset)
+        values = []
+        for _ in range(coins):
+            code, offset = read_varint(data, offset)
+            if code >> 1:
+                # the height is followed by a legacy version field.
+                _, offset = read_varint(data, offset)
+            amount, offset = read_varint(data, offset)
+            values.append(decompress_amount(amount))
+            script, offset = read_varint(data, offset)
+            offset += SPECIAL_SCRIPT_SIZES[script] if script < len(SPECIAL_SCRIPT_SIZES) else script - len(SPECIAL_SCRIPT_SIZES)
+        spent.append(values)
+    return spent
+
+
+def checksum(prev_block: Buffer, data: Buffer) -> bytes:
+    """Compute the checksum of undo data.
+
+    :param prev_block: the hash of the parent of the block the undo data belongs to.
+    :param data: the undo data.
+    """
+    return double_sha256(bytes(prev_block) + bytes(data))
+
+
+def file_amounts(path: str) -> List[BlockAmounts]:
+    """Compute the amounts of the blocks of a blk*.dat file from the matching rev*.dat file.
+    Both files are memory mapped and only the shape and totals of each block are kept, so that memory does not
+    depend on the size of the files. This is meant to run in the worker processes of ingest.map_files.
+
+    :param path: the path to the blk*.dat file.
+    :returns: the amounts of the blocks with undo data, in block file order. Blocks without undo data
+    (the genesis block, blocks not connected to the chain) are left out.
+    """
+    undo_path = os.path.join(os.path.dirname(path), f"rev{ingest.file_number(path):05d}.dat")
+    if not os.path.exists(undo_path):
+        return []
+    # the shape of a block (number of inputs of each non coinbase transaction) narrows down the undo record candidates.
+    by_shape: Dict[Tuple[int, ...], List[Tuple[int, bytes, bytes, int]]] = {}
+    blocks = []
+    with open(path, "rb") as f:
+        for position, (_, data) in enumerate(parser.read_mmap(f)):
+            block = Block.deserialize(data)
+            transactions = iter(block.transactions)
+            next(transactions)
+            shape = []
+            output = 0
+            for transaction in transactions:
+                shape.append(transaction.input_count)
+                output += sum(txout.value for txout in transaction.outputs)
+            blocks.append(None)
+            by_shape.setdefault(tuple(shape), []).append((position, block.hash, bytes(block.prev_block), output))
+    # blocks without non coinbase transactions share the same undo data: index them by checksum once.
+    empty = {checksum(prev_block, b"\x00"): (position, hash_, output) for position, hash_, prev_block, output in by_shape.pop((), [])}
+    with open(undo_path, "rb") as f:
+        for _, data, expected in parser.read_undo_mmap(f):
+            spent = parse(data)
+            if not spent:
+                match = empty.pop(bytes(expected), None)
+            else:
+                match = _pair(by_shape.get(tuple(len(values) for values in spent), []), data, expected)
+            if match is not None:
+                position, hash_, output = match
+                input_ = sum(sum(values) for values in spent)
+                blocks[position] = BlockAmounts(hash_, input_, output, input_ - output)
+    return [amounts for amounts in blocks if amounts is not None]
+
+
+def _pair(candidates: List[Tuple[int, bytes, bytes, int]], data: Buffer, expected: Buffer):
+    """Find the block an undo record belongs to among blocks with the same shape, and remove it from the candidates.
+    """
+    for i, (position, hash_, prev_block, output) in enumerate(candidates):
+        if checksum(prev_block, data) == expected:
+            del candidates[i]
+            return position, hash_, output
+    return None
+
+
+def amounts(directory: str, workers: int = None, max_pending: int = None) -> Generator[BlockAmounts, None, None]:
+    """Compute the amounts of every block of a blocks/ directory from the undo data, in a single parallel pass.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param workers: the number of worker processes, defaults to the number of cpus.
+    :param max_pending: the maximum number of files processed ahead of the consumer.
+    :returns: a generator yielding the amounts of each block with undo data, ordered by file number then offset.
+    """
+    for _, results in ingest.map_files(file_amounts, ingest.list_files(directory), workers=workers, max_pending=max_pending):
+        yield from results
@@ -0,0 +1,185 @@
+"""Define the cache of unspent transaction outputs used to compute block amounts during ingest.
+
+The input of a transaction is only known by its outpoint (the hash and index of the output it spends): its value
+must be looked up in the set of unspent outputs created by previous blocks, so the blocks of the main chain must be
+applied in height order. Stale blocks must not be applied: their spends would remove outputs that the main chain
+spends later.
+
+The most recently created outputs are kept in memory, as they are the most likely to be spent soon. When the cache
+is full the oldest outputs are spilled to an on-disk store, which is read when an output is not found in memory.
+An in-memory entry costs about 200 bytes, so the maximum number of entries sets the memory ceiling of the cache.
+The on-disk store is a sqlite database: unlike dbm.dumb, the only dbm backend always available, it keeps no
+per-key state in memory and reuses the space of deleted outputs.
+"""
+import os
+import sqlite3
+import struct
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from blockchain.amount import Amounts, from_coinbase, subsidy
+from blockchain.block import Block
+
+OUTPOINT_INDEX = struct.Struct("<I")
+
+# outputs whose script starts with OP_RETURN can never be spent, they are not added to the cache.
+OP_RETURN = 0x6A
+
+# the default maximum number of outputs held in memory, about 4GB.
+MAX_ENTRIES = 20000000
+
+# the page cache of the on-disk store, in KiB (negative values are sizes for sqlite, not pages).
+DISK_CACHE_SIZE = -65536
+
+Outpoint = bytes
+
+
+def outpoint(txid: bytes, index: int) -> Outpoint:
+    """Build the key of an output.
+
+    :param txid: the hash of the transaction, in internal byte order.
+    :param index: the position of the output in the transaction.
+    """
+    return bytes(txid) + OUTPOINT_INDEX.pack(index)
+
+
+def changes(block: Block) -> Tuple[int, int, List[Outpoint], List[Tuple[Outpoint, int]]]:
+    """Compute the changes a block makes to the set of unspent outputs.
+    This does not depend on the cache, so it can run in worker processes.
+
+    :param block: the block.
+    :returns: the value of the coinbase, the output of the non coinbase transactions, the outpoints spent
+    and the outpoints created with their value.
+    """
+    coinbase_value = 0
+    output = 0
+    spent = []
+    created = []
+    for position, transaction in enumerate(block.transactions):
+        txid = transaction.txid
+        value = 0
+        for index, txout in enumerate(transaction.outputs):
+            value += txout.value
+            if not txout.script or txout.script[0] != OP_RETURN:
+                created.append((outpoint(txid, index), txout.value))
+        if position == 0:
+            coinbase_value = value
+            continue
+        output += value
+        spent.extend(outpoint(txin.prev_hash, txin.prev_index) for txin in transaction.inputs)
+    return coinbase_value, output, spent, created
+
+
+class UTXOCache:
+    """Cache unspent outputs in memory with a least recently created eviction to an on-disk store.
+    """
+
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES):
+        """Constructor.
+
+        :param path: the path to the on-disk store, which is recreated.
+        :param max_entries: the maximum number of outputs held in memory.
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        self.max_entries = max_entries
+        # the height of the last block applied.
+        self.height = -1
+        self.hits = 0
+        self.misses = 0
+        self.missing = 0
+        self.spilled = 0
+        self._memory = OrderedDict()
+        self._disk = sqlite3.connect(path)
+        # the store is rebuilt on every run, durability is not needed.
+        self._disk.execute("PRAGMA journal_mode = OFF")
+        self._disk.execute("PRAGMA synchronous = OFF")
+        self._disk.execute(f"PRAGMA cache_size = {DISK_CACHE_SIZE}")
+        self._disk.execute("CREATE TABLE utxo (outpoint BLOB PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID")
+
+    def add(self, key: Outpoint, value: int):
+        """Add an unspent output.
+
+        :param key: the outpoint of the output.
+        :param value: the value of the output in satoshis.
+        """
+        self._memory[key] = value
+        if len(self._memory) > self.max_entries:
+            evicted, evicted_value = self._memory.popitem(last=False)
+            self._disk.execute("INSERT OR REPLACE INTO utxo VALUES (?, ?)", (evicted, evicted_value))
+            self.spilled += 1
+
+    def spend(self, key: Outpoint) -> Optional[int]:
+        """Remove an output from the cache.
+
+        :param key: the outpoint of the output.
+        :returns: the value of the output, None if the output is unknown.
+        """
+        value = self._memory.pop(key, None)
+        if value is not None:
+            self.hits += 1
+            return value
+        stored = self._disk.execute("SELECT value FROM utxo WHERE outpoint = ?", (key,)).fetchone()
+        if stored is None:
+            self.missing += 1
+            return None
+        self._disk.execute("DELETE FROM utxo WHERE outpoint = ?", (key,))
+        self.misses += 1
+        return stored[0]
+
+    def apply(self, height: int, spent: Iterable[Outpoint], created: Iterable[Tuple[Outpoint, int]]) -> Optional[int]:
+        """Apply the changes of a block of the main chain to the cache.
+        Outputs are added before inputs are spent, as a transaction may spend an output of the same block.
+
+        :param height: the height of the block, blocks are applied in height order from the genesis block.
+        :param spent: the outpoints spent by the block.
+        :param created: the outpoints created by the block with their value.
+        :returns: the sum of the values spent, None if a spent output is unknown.
+        :raises ValueError: if the block does not follow the last block applied.
+        """
+        if height != self.height + 1:
+            raise ValueError(f"Blocks must be applied in height order: expected {self.height + 1}, got {height}.")
+        self.height = height
+        for key, value in created:
+            self.add(key, value)
+        total = 0
+        complete = True
+        for key in spent:
+            value = self.spend(key)
+            if value is None:
+                complete = False
+            else:
+                total += value
+        if self.spilled:
+            self._disk.commit()
+        return total if complete else None
+
+    @property
+    def hit_rate(self) -> float:
+        """The ratio of spent outputs found in memory.
+        """
+        lookups = self.hits + self.misses + self.missing
+        return self.hits / lookups if lookups else 1.0
+
+    def close(self):
+        """Close the on-disk store.
+        """
+        self._disk.commit()
+        self._disk.close()
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+
+def amounts(height: int, input_: Optional[int], coinbase_value: int, output: int) -> Amounts:
+    """Compute the amounts of a block from the values of its inputs.
+
+    :param height: the height of the block.
+    :param input_: the sum of the values spent by the block, None if it could not be resolved.
+    :param coinbase_value: the sum of the outputs of the coinbase transaction.
+    :param output: the sum of the outputs of the non coinbase transactions.
+    :returns: the amounts. They are derived from the coinbase when the inputs could not be resolved.
+    """
+    if input_ is None:
+        return from_coinbase(height, coinbase_value, output)
+    return Amounts(subsidy(height), input_, output, input_ - output)
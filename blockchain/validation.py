@@ -0,0 +1,141 @@
+"""Define methods to validate block headers.
+
+The checks only depend on the header itself, so whole files can be validated independently of each other:
+- the compact target (nbits) must decode to a positive target no greater than the proof of work limit
+- the hash of the header must not be greater than the target (proof of work)
+- the timestamp must not be before the genesis block nor too far in the future
+
+Checks against the rest of the chain (median time past, difficulty adjustments) are out of scope.
+Rejection reasons follow the names used by bitcoind.
+https://github.com/bitcoin/bitcoin/blob/master/src/pow.cpp (CheckProofOfWork)
+https://github.com/bitcoin/bitcoin/blob/master/src/validation.cpp (ContextualCheckBlockHeader)
+"""
+import struct
+import time
+from functools import lru_cache, partial
+from typing import Generator, List, NamedTuple, Optional, Tuple
+
+from blockchain import ingest, parser
+from blockchain.block import DIGEST_SIZE, HEADER, HeaderTable
+from blockchain.difficulty import CACHE_SIZE, target
+
+# the highest target allowed on the main network.
+# https://github.com/bitcoin/bitcoin/blob/master/src/chainparams.cpp
+POW_LIMIT = 0x00000000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF
+
+# the timestamp of the genesis block.
+GENESIS_TIMESTAMP = 1231006505
+
+# the number of seconds a block timestamp may be ahead of the current time.
+MAX_FUTURE_BLOCK_TIME = 2 * 60 * 60
+
+BAD_DIFFBITS = "bad-diffbits"
+HIGH_HASH = "high-hash"
+TIME_TOO_OLD = "time-too-old"
+TIME_TOO_NEW = "time-too-new"
+
+# the timestamp and nbits fields of the header.
+TIME_BITS = struct.Struct("<II")
+TIME_OFFSET = 68
+
+
+class Invalid(NamedTuple):
+    """Represent a header that failed validation.
+    """
+
+    path: str
+    offset: int
+    hash: bytes
+    reason: str
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def check_bits(bits: int) -> Optional[int]:
+    """Decode and check the compact form of a target.
+
+    https://github.com/bitcoin/bitcoin/blob/master/src/pow.cpp (DeriveTarget)
+
+    :param bits: the compact form of the target.
+    :returns: the target, None if the compact form is negative, zero, overflows or is above the proof of work limit.
+    """
+    exponent = bits >> 24
+    mantissa = bits & 0x007FFFFF
+    negative = mantissa != 0 and bits & 0x00800000
+    overflow = mantissa != 0 and (exponent > 34 or (mantissa > 0xFF and exponent > 33) or (mantissa > 0xFFFF and exponent > 32))
+    if negative or overflow:
+        return None
+    value = target(bits)
+    if value == 0 or value > POW_LIMIT:
+        return None
+    return value
+
+
+def validate(header: bytes, hash_: bytes, now: int) -> Optional[str]:
+    """Validate a header.
+
+    :param header: the serialized header.
+    :param hash_: the hash of the header, in internal byte order.
+    :param now: the current time as the number of seconds since the UNIX epoch.
+    :returns: the reason the header is invalid, None if it is valid.
+    """
+    timestamp, bits = TIME_BITS.unpack_from(header, TIME_OFFSET)
+    value = check_bits(bits)
+    if value is None:
+        return BAD_DIFFBITS
+    if int.from_bytes(hash_, byteorder="little") > value:
+        return HIGH_HASH
+    if timestamp < GENESIS_TIMESTAMP:
+        return TIME_TOO_OLD
+    if timestamp > now + MAX_FUTURE_BLOCK_TIME:
+        return TIME_TOO_NEW
+    return None
+
+
+def validate_headers(headers: HeaderTable, now: int = None) -> List[Tuple[int, str]]:
+    """Validate a batch of headers.
+
+    :param headers: the headers to validate.
+    :param now: the current time, defaults to the time of the call.
+    :returns: the position and reason of each invalid header.
+    """
+    now = int(time.time()) if now is None else now
+    invalid = []
+    with headers.buffer as raw, headers.hashes() as hashes:
+        for i in range(len(headers)):
+            start = i * HEADER.size
+            reason = validate(raw[start : start + HEADER.size], hashes[i * DIGEST_SIZE : (i + 1) * DIGEST_SIZE], now)
+            if reason is not None:
+                invalid.append((i, reason))
+    return invalid
+
+
+def validate_file(path: str, now: int = None) -> List[Tuple[int, bytes, str]]:
+    """Validate the headers of a blk*.dat file.
+    This is meant to run in the worker processes of ingest.map_files.
+
+    :param path: the path to the blk*.dat file.
+    :param now: the current time, defaults to the time of the call.
+    :returns: the offset, hash and reason of each invalid header.
+    """
+    headers = HeaderTable()
+    offsets = []
+    with open(path, "rb") as f:
+        for offset, data in parser.read_mmap(f):
+            headers.append(data)
+            offsets.append(offset)
+            data.release()
+    return [(offsets[i], headers.hash(i), reason) for i, reason in validate_headers(headers, now=now)]
+
+
+def validate_directory(directory: str, workers: int = None, max_pending: int = None) -> Generator[Invalid, None, None]:
+    """Validate the headers of every block of a blocks/ directory across a pool of worker processes.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param workers: the number of worker processes, defaults to the number of cpus.
+    :param max_pending: the maximum number of files validated ahead of the consumer.
+    :returns: a generator yielding the invalid headers, ordered by file number then offset.
+    """
+    func = partial(validate_file, now=int(time.time()))
+    for path, results in ingest.map_files(func, ingest.list_files(directory), workers=workers, max_pending=max_pending):
+        for offset, hash_, reason in results:
+            yield Invalid(path, offset, hash_, reason)
@@ -1,25 +1,54 @@
 """Endpoints for the block blueprint.
 """
+import json
 from http import HTTPStatus
 
-from flask import jsonify, request
+from flask import Response, current_app, request, stream_with_context
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
 
-from api.blueprint.block import services
+from api.blueprint.block import services, util
 from api.decorators import listable
+from api.error.definition import InvalidParameter
+from api.serialization.serializer import serializer
 
 
 def retrieve(block_hash):
     """Retrieve a specific block id.
     """
-    block_data = services.retrieve(block_hash)
-    return (jsonify(block_data), HTTPStatus.OK)
+    return serializer.response(services.retrieve(block_hash), HTTPStatus.OK)
 
 
 def create():
     """Create a block.
     """
     block_data = services.create(**request.json)
-    return (jsonify(block_data), HTTPStatus.CREATED)
+    return serializer.response(serializer.block(block_data), HTTPStatus.CREATED)
+
+
+def create_batch():
+    """Create blocks in a single request.
+    The body is either a JSON array of blocks or newline delimited JSON (application/x-ndjson), one block per line.
+    """
+    items = _read_batch()
+    max_batch_size = current_app.config["MAX_BATCH_SIZE"]
+    if len(items) > max_batch_size:
+        raise RequestEntityTooLarge(f"A batch contains at most {max_batch_size} blocks.")
+    batch_data = services.create_batch(items)
+    return serializer.response(batch_data, HTTPStatus.OK)
+
+
+def _read_batch():
+    """Read the items of a batch from the request body.
+    """
+    if request.mimetype == "application/x-ndjson":
+        try:
+            return [json.loads(line) for line in request.get_data().splitlines() if line.strip()]
+        except ValueError:
+            raise BadRequest("Failed to decode newline delimited JSON object.")
+    items = request.get_json()
+    if not isinstance(items, list):
+        raise BadRequest("The request body must be a JSON array of blocks.")
+    return items
 
 
 def delete(block_hash):
@@ -27,7 +56,7 @@ def delete(block_hash):
     For CRUD completeness and admin.
     """
     deleted = services.delete(block_hash)
-    return (jsonify(deleted), HTTPStatus.OK)
+    return serializer.response(deleted, HTTPStatus.OK)
 
 
 @listable
@@ -35,4 +64,31 @@ def list_(pagination):
     """List blocks.
     """
     list_data = services.list_(**pagination)
-    return (jsonify(list_data), HTTPStatus.OK)
+    return serializer.response(serializer.list_(list_data), HTTPStatus.OK)
+
+
+def export():
+    """Export blocks in chain order as newline delimited JSON, one block per line.
+    The response is streamed as blocks are read from the database. The export query is executed before the
+    response is created so that database errors are reported with their status instead of a truncated response.
+    """
+    from_height = _height_parameter("from_height")
+    to_height = _height_parameter("to_height")
+    blocks = services.export(from_height, to_height, itersize=current_app.config["EXPORT_ITERSIZE"])
+    lines = (serializer.block(block_data) + b"\n" for block_data in blocks)
+    return Response(stream_with_context(lines), status=HTTPStatus.OK, mimetype="application/x-ndjson")
+
+
+def _height_parameter(name):
+    """Read a height from the query string.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        height = int(value)
+    except ValueError:
+        height = -1
+    if not 0 <= height <= util.MAX_HEIGHT:
+        raise InvalidParameter(name, f"expected an integer between 0 and {util.MAX_HEIGHT}")
+    return height
@@ -0,0 +1,145 @@
+"""Bulk loader for the block table.
+Blocks are written in batches with COPY in binary format, which is much faster than one INSERT per block.
+https://www.postgresql.org/docs/12/sql-copy.html#id-1.9.3.55.9.4
+
+Each batch is copied into a staging table then merged into btc.block in a single transaction, so that loading
+the same blocks twice is a no-op. Batches are spread across several writer connections.
+"""
+import io
+import queue
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List
+
+from api.blueprint.block import sql
+from api.blueprint.block.services import to_database_types
+
+# the binary COPY header: signature, flags and header extension length.
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_HEADER = COPY_SIGNATURE + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+INT4 = struct.Struct("!ii")
+INT8 = struct.Struct("!iq")
+LENGTH = struct.Struct("!i")
+
+# the staging table columns, in COPY order, with the insert parameter and the type of each column.
+COLUMNS = (
+    ("block_hash", "hash", "bytea"),
+    ("size", "size", "integer"),
+    ("transaction_counter", "transaction_count", "integer"),
+    ("block_version", "version", "bigint"),
+    ("previous_hash", "previous_hash", "bytea"),
+    ("merkle_root_hash", "merkle_root", "bytea"),
+    ("block_timestamp", "timestamp", "bigint"),
+    ("nbits", "nbits", "bytea"),
+    ("nonce", "nonce", "bigint"),
+    ("height", "height", "integer"),
+    ("block_subsidy", "subsidy", "bigint"),
+    ("block_input", "input", "bigint"),
+    ("block_output", "output", "bigint"),
+    ("transaction_fee", "transaction_fee", "bigint"),
+)
+FIELD_COUNT = struct.pack("!h", len(COLUMNS))
+
+# the default number of blocks per batch.
+BATCH_SIZE = 10000
+# the default number of writer connections.
+WRITERS = 4
+
+
+def encode(records: Iterable[dict]) -> bytes:
+    """Encode blocks in the binary COPY format.
+
+    :param records: the blocks as insert parameters, see to_database_types.
+    :returns: the data to copy into the staging table.
+    """
+    buffer = io.BytesIO()
+    buffer.write(COPY_HEADER)
+    for params in records:
+        buffer.write(FIELD_COUNT)
+        for _, key, type_ in COLUMNS:
+            value = params[key]
+            if type_ == "bytea":
+                buffer.write(LENGTH.pack(len(value)))
+                buffer.write(value)
+            elif type_ == "integer":
+                buffer.write(INT4.pack(4, value))
+            else:
+                buffer.write(INT8.pack(8, value))
+    buffer.write(COPY_TRAILER)
+    return buffer.getvalue()
+
+
+def load_batch(connection, records: List[dict]) -> int:
+    """Load a batch of blocks in a single transaction.
+
+    :param connection: the psycopg2 connection to write with.
+    :param records: the blocks as validated block json schema objects.
+    :returns: the number of blocks inserted, blocks that already exist are skipped.
+    """
+    data = encode(to_database_types(dict(record)) for record in records)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql.CREATE_STAGING)
+            cursor.copy_expert(sql.COPY_STAGING, io.BytesIO(data))
+            cursor.execute(sql.MERGE_STAGING)
+            inserted = cursor.rowcount
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return inserted
+
+
+def load(
+    records: Iterable[dict], connect: Callable, batch_size: int = BATCH_SIZE, writers: int = WRITERS
+) -> Iterator[int]:
+    """Load blocks in batches across several writer connections.
+    The number of batches waiting to be written is bounded, which throttles the producer of the records.
+
+    :param records: the blocks as validated block json schema objects.
+    :param connect: a function returning a new psycopg2 connection.
+    :param batch_size: the number of blocks per batch.
+    :param writers: the number of writer connections.
+    :returns: a generator yielding the number of blocks inserted by each batch, in the order of the batches.
+    """
+    connections = queue.Queue()
+    for _ in range(writers):
+        connections.put(connect())
+
+    def write(batch):
+        connection = connections.get()
+        try:
+            return load_batch(connection, batch)
+        finally:
+            connections.put(connection)
+
+    pending = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            for batch in _batches(records, batch_size):
+                if len(pending) >= 2 * writers:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(write, batch))
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        while not connections.empty():
+            connections.get().close()
+
+
+def _batches(records: Iterable[dict], batch_size: int) -> Iterator[List[dict]]:
+    """Group records in lists of batch_size records.
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -9,5 +9,7 @@ block = Blueprint("block", __name__, url_prefix="/blocks")
 
 block.add_url_rule("/<string:block_hash>", endpoint="retrieve", methods=["GET"], view_func=endpoint.retrieve)
 block.add_url_rule("", endpoint="create", methods=["POST"], view_func=endpoint.create)
+block.add_url_rule("/batch", endpoint="create_batch", methods=["POST"], view_func=endpoint.create_batch)
 block.add_url_rule("/<string:block_hash>", endpoint="delete", methods=["DELETE"], view_func=endpoint.delete)
 block.add_url_rule("", endpoint="list", methods=["GET"], view_func=endpoint.list_)
+block.add_url_rule("/export", endpoint="export", methods=["GET"], view_func=endpoint.export)
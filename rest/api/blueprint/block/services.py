@@ -1,29 +1,55 @@
 """Service layer for the block blueprint.
 """
-from jsonschema import Draft7Validator
+from collections import deque
+from contextlib import ExitStack
+from functools import partial
+from http import HTTPStatus
+
+from jsonschema.exceptions import ValidationError
+from psycopg2.extras import execute_values
 
 from api.blueprint.block import sql, util
+from api.cache import block_cache
 from api.config import version
 from api.database import db
-from api.error.definition import ResourceNotFound
+from api.error.definition import (
+    BaseError,
+    InvalidParameter,
+    InvalidValue,
+    RequiredField,
+    ResourceAlreadyExists,
+    ResourceNotFound,
+)
+from api.error.handler import extract_validation_error
 from api.resource import ApiResource
 from api.schema import store
+from api.serialization.serializer import serializer
+
 
+def retrieve(block_hash: str) -> bytes:
+    """Retrieve a block, serialized with the response serializer.
+    Blocks are immutable so their serialized form is cached: cache hits are neither queried nor serialized again.
 
-def retrieve(block_hash: str) -> dict:
-    """Retrieve a block.
-    
     :param block_hash: the hash of the block to retrieve.
-    :returns: the query result.
+    :returns: the serialized block.
     """
+    key = block_hash.lower()
+    cached = block_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # read before the query: a block deleted while it is read is not cached again.
+    generation = block_cache.generation
     result = None
-    with db.cursor() as cursor:
+    with db.cursor(tuples=True) as cursor:
         cursor.execute(sql.RETRIEVE, {"hash": bytearray.fromhex(block_hash)})
         result = cursor.fetchone()
     if result is None:
         raise ResourceNotFound(ApiResource.BLOCK, block_hash, parameter="id")
 
-    return _to_api_types(dict(result))
+    body = serializer.block(_to_api_types(result))
+    block_cache.set(key, body, generation=generation)
+    return body
 
 
 def create(**kwargs) -> dict:
@@ -31,14 +57,73 @@ def create(**kwargs) -> dict:
 
     :returns: the created block data.
     """
-    validator = Draft7Validator(store.block)
-    validator.validate(kwargs)
+    store.validate_block(kwargs)
+    _require_insert_fields(kwargs)
 
-    params = _to_database_types(kwargs)
-    with db.cursor() as cursor:
+    params = to_database_types(kwargs)
+    with db.cursor(tuples=True) as cursor:
         cursor.execute(sql.CREATE, params)
-        data = dict(cursor.fetchone())
-    return _to_api_types(data)
+        result = cursor.fetchone()
+    return _to_api_types(result)
+
+
+def create_batch(items: list) -> dict:
+    """Create blocks in a single statement.
+    Each item is validated on its own: invalid items and blocks that already exist are reported without
+    preventing the other blocks from being created.
+
+    :param items: the blocks to create.
+    :returns: the batch result, with the created block or the error of each item in the order of the items.
+    """
+    results = [None] * len(items)
+    pending = {}
+    params = []
+    for i, item in enumerate(items):
+        try:
+            store.validate_block(item)
+            _require_insert_fields(item)
+            if item["hash"].lower() in pending:
+                raise ResourceAlreadyExists(ApiResource.BLOCK, item["hash"], parameter="hash")
+            params.append(to_database_types(dict(item)))
+        except BaseError as e:
+            results[i] = _to_batch_error(i, e)
+        except ValidationError as e:
+            results[i] = _to_batch_error(i, extract_validation_error(e))
+        else:
+            pending[item["hash"].lower()] = i
+
+    created = []
+    if params:
+        with db.cursor(tuples=True) as cursor:
+            created = execute_values(
+                cursor, sql.CREATE_BATCH, params, template=sql.CREATE_BATCH_TEMPLATE, page_size=len(params), fetch=True
+            )
+    for row in created:
+        block_data = _to_api_types(row)
+        i = pending.pop(block_data["hash"])
+        results[i] = {"index": i, "status": HTTPStatus.CREATED, "block": block_data}
+    # the blocks that were not returned already existed.
+    for i in pending.values():
+        results[i] = _to_batch_error(i, ResourceAlreadyExists(ApiResource.BLOCK, items[i]["hash"], parameter="hash"))
+
+    return {
+        "object": ApiResource.BATCH,
+        "created": len(created),
+        "failed": len(items) - len(created),
+        "data": results,
+        "api_version": version.API_VERSION,
+    }
+
+
+def _to_batch_error(index: int, error) -> dict:
+    """Wrap the error of an item of a batch.
+
+    :param index: the position of the item in the batch.
+    :param error: the error.
+    :type error: BaseError or werkzeug.exceptions.HTTPException.
+    """
+    status = error.status if isinstance(error, BaseError) else error.code
+    return {"index": index, "status": status, "error": error}
 
 
 def delete(block_hash: str) -> dict:
@@ -49,98 +134,205 @@ def delete(block_hash: str) -> dict:
     """
     with db.cursor() as cursor:
         cursor.execute(sql.DELETE, {"hash": bytearray.fromhex(block_hash)})
+    # until the deletion is committed, a concurrent retrieve can still read the block and cache it again.
+    db.after_commit(partial(block_cache.invalidate, block_hash.lower()))
     return {"object": ApiResource.BLOCK, "hash": block_hash, "deleted": True}
 
 
 def list_(limit=None, after=None, before=None) -> dict:
-    """List blocks.
+    """List blocks, most recent first.
+    Blocks are ordered by height then hash, and pages are delimited by cursors on that order.
+
+    :param limit: the maximum number of blocks to return.
+    :param after: the cursor of the block after which to list blocks, for the next page.
+    :param before: the cursor of the block before which to list blocks, for the previous page.
+    :returns: the list wrapper object.
     """
-    result = None
-    with db.cursor() as cursor:
-        cursor.execute(sql.LIST, {"limit": limit, "after": after, "before": before})
+    if after is not None and before is not None:
+        raise InvalidParameter("before", "after and before are mutually exclusive")
+    params = {"limit": limit}
+    query = sql.LIST
+    if after is not None:
+        query = sql.LIST_AFTER
+        params["height"], params["hash"] = _decode_cursor("after", after)
+    elif before is not None:
+        query = sql.LIST_BEFORE
+        params["height"], params["hash"] = _decode_cursor("before", before)
+
+    with db.cursor(tuples=True) as cursor:
+        cursor.execute(query, params)
         result = cursor.fetchall()
-    if result is None:
-        return {
-            "object": ApiResource.LIST,
-            "has_more": False,
-            "count": 0,
-            "data": [],
-            "api_version": version.API_VERSION,
-        }
-    return _to_list_result(result)
-
-
-def _get_difficulty(nbits: bytes) -> dict:
-    """Compute and return difficulty information.
-    
-    :param nbits: the nbits data as returned by a create, retrieve or list query.
-    :returns: the difficulty information.
+
+    has_more = len(result) > limit
+    result = result[:limit]
+    if before is not None:
+        result.reverse()
+    return _to_list_result(result, has_more, after=after, before=before)
+
+
+def export(from_height=None, to_height=None, itersize=None):
+    """Export blocks in chain order.
+    Blocks are streamed out of a server-side cursor so memory does not depend on the number of blocks.
+    The connection is checked out and the query executed by the call so that errors are raised before the
+    response is started, only the rows are read lazily.
+
+    :param from_height: the lowest height to export if any.
+    :param to_height: the highest height to export if any.
+    :param itersize: the number of blocks fetched from the database at a time.
+    :returns: a generator of blocks.
     """
-    # the value is the hexadecimal representation of the target with the leading 0x.
-    target = util.compute_target(nbits)
-    pdiff = util.compute_pdiff(target)
-    bdiff = util.compute_bdiff(target)
-    return {
-        "target": f"{target:#066x}",
-        "pdifficulty": str(pdiff),
-        "bdifficulty": str(bdiff),
-        "nbits": int.from_bytes(nbits, byteorder="little", signed=False),
-    }
+    with ExitStack() as stack:
+        cursor = stack.enter_context(db.cursor(name="block_export", itersize=itersize, tuples=True))
+        cursor.execute(sql.EXPORT, {"from_height": from_height, "to_height": to_height})
+        return _export_rows(cursor, stack.pop_all())
+
+
+def _export_rows(cursor, stack):
+    """Read the exported blocks from an executed cursor, closing it once exhausted.
+    """
+    with stack:
+        for row in cursor:
+            yield _to_api_types(row)
+
+
+def _decode_cursor(parameter: str, cursor: str) -> tuple:
+    """Decode a list cursor.
+
+    :param parameter: the name of the parameter holding the cursor.
+    :param cursor: the cursor.
+    :returns: the height and the hash of the block.
+    """
+    try:
+        return util.decode_cursor(cursor)
+    except ValueError:
+        raise InvalidParameter(parameter, "malformed cursor")
+
+
+def prewarm_difficulty() -> int:
+    """Compute the difficulty information of every stored nbits value.
+    This runs outside of a request, with a connection of its own.
+
+    :returns: the number of distinct nbits values.
+    """
+    with db.pool.connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(sql.DISTINCT_NBITS)
+            count = util.prewarm_difficulty(row["nbits"] for row in cursor)
+        connection.commit()
+    return count
+
 
+def _require_insert_fields(data: dict):
+    """Check that a validated block has the fields of the insert that the block json schema does not require.
 
-def _to_database_types(data: dict) -> dict:
+    :param data: the block data, validated against the block json schema.
+    :raises RequiredField: if difficulty or height is missing.
+    """
+    for field in ("difficulty", "height"):
+        if field not in data:
+            raise RequiredField(field)
+
+
+def _from_hex(data: dict, field: str) -> bytearray:
+    """Decode a hexadecimal field of a block.
+
+    :raises InvalidValue: if the field is not a hexadecimal string.
+    """
+    try:
+        return bytearray.fromhex(data[field])
+    except ValueError:
+        raise InvalidValue(deque([field]), "expected a hexadecimal string")
+
+
+def to_database_types(data: dict) -> dict:
     """Convert values in the dictionary to the relevant database types for insert.
     This function essentially maps the json schema to insert parameters.
 
-    :param data: the data to insert. The data must come from a validated block json schema.
+    :param data: the data to insert. The data must come from a validated block json schema, see _require_insert_fields.
     :returns: a dictionary with the data ready to be accepted to parametrize an insert query.
+    :raises InvalidValue: if a hash is not a hexadecimal string.
     """
     params = data
-    params["hash"] = bytearray.fromhex(params["hash"])
-    params["nbits"] = params["difficulty"]["nbits"].to_bytes(4, byteorder="little", signed=False)
-    params["merkle_root"] = bytearray.fromhex(data["merkle_root"])
-    params["previous_hash"] = bytearray.fromhex(data["previous_hash"])
+    params["hash"] = _from_hex(params, "hash")
+    # integers may be given as floats with a zero fractional part, which the schema accepts.
+    params["nbits"] = int(params["difficulty"]["nbits"]).to_bytes(4, byteorder="little", signed=False)
+    params["merkle_root"] = _from_hex(data, "merkle_root")
+    params["previous_hash"] = _from_hex(data, "previous_hash")
     params.pop("difficulty")
     return params
 
 
-def _to_api_types(data: dict) -> dict:
-    """Convert values coming from a database query into the relevant types for api consumers.
-    This is roughly the opposite of _to_database_types except that the data is enriched with computed, read-only values.
-    
-    :param data: the data coming from the database query. The data must conform to the block json schema.
+def _to_api_types(row: tuple) -> dict:
+    """Convert a block row coming from a database query into the relevant types for api consumers.
+    This is roughly the opposite of to_database_types except that the data is enriched with computed, read-only values.
+    The api dictionary is built directly from the row, without intermediate dictionaries.
+
+    :param row: the plain tuple row, its columns are in the order of sql.BLOCK_COLUMNS.
     :returns: a dictionary with the data ready to be returned by the api.
     """
-    result = data
-    result["difficulty"] = _get_difficulty(result.pop("nbits"))
-    result["hash"] = result["hash"].hex()
-    result["merkle_root"] = result["merkle_root"].hex()
-    result["previous_hash"] = result["previous_hash"].hex()
-    result["api_version"] = version.API_VERSION
-    result["object"] = ApiResource.BLOCK
-    result["created_at"] = int(result["created_at"].timestamp())
-    return result
-
-
-def _to_list_result(data: list) -> dict:
+    (
+        created_at,
+        hash_,
+        size,
+        transaction_count,
+        version_,
+        previous_hash,
+        merkle_root,
+        timestamp,
+        nbits,
+        nonce,
+        height,
+        subsidy,
+        input_,
+        output,
+        transaction_fee,
+    ) = row
+    return {
+        "created_at": int(created_at.timestamp()),
+        "hash": hash_.hex(),
+        "size": size,
+        "transaction_count": transaction_count,
+        "version": version_,
+        "previous_hash": previous_hash.hex(),
+        "merkle_root": merkle_root.hex(),
+        "timestamp": timestamp,
+        "difficulty": util.get_difficulty(nbits),
+        "nonce": nonce,
+        "height": height,
+        "subsidy": subsidy,
+        "input": input_,
+        "output": output,
+        "transaction_fee": transaction_fee,
+        "api_version": version.API_VERSION,
+        "object": ApiResource.BLOCK,
+    }
+
+
+def _to_list_result(data: list, has_more: bool, after: str = None, before: str = None) -> dict:
     """Convert values coming from a list query on the database into the relevant list wrapper object for api consumers.
-    
-    :param data: the data coming from the database query. With the exception of the list specific fields, each item in the data must
-    conform to the block json schema. List specific fields are `count` and `has_more`.
+
+    :param data: the rows coming from the list query as plain tuples, most recent block first.
+    :param has_more: whether there are more blocks past the page in the direction of the listing.
+    :param after: the cursor the page was listed after if any.
+    :param before: the cursor the page was listed before if any.
     :returns: a list wrapper object as a dictionary with the data ready to be returned by the api.
     """
-    count = 0
-    has_more = False
-    blocks = list()
-    for r in data:
-        block_data = _to_api_types(dict(r))
-        block_data.pop("count")
-        block_data.pop("has_more")
-        blocks.append(block_data)
+    next_cursor = None
+    previous_cursor = None
+    if data:
+        height, hash_ = sql.BLOCK_COLUMNS["height"], sql.BLOCK_COLUMNS["hash"]
+        first, last = data[0], data[-1]
+        # listing before a cursor goes towards the most recent blocks, so there are older blocks and the other way around.
+        if has_more or before is not None:
+            next_cursor = util.encode_cursor(last[height], last[hash_])
+        if (has_more and before is not None) or after is not None:
+            previous_cursor = util.encode_cursor(first[height], first[hash_])
     return {
         "object": ApiResource.LIST,
         "has_more": has_more,
-        "count": count,
-        "data": blocks,
+        "count": len(data),
+        "next_cursor": next_cursor,
+        "previous_cursor": previous_cursor,
+        "data": [_to_api_types(r) for r in data],
         "api_version": version.API_VERSION,
     }
@@ -1,29 +1,40 @@
 """SQL queries for the block blueprint.
+The queries returning blocks share a single select list: the position of each column in their rows is computed once here.
 """
+# The columns of the queries returning blocks, in select order, as (column of btc.block, field name).
+_BLOCK_TABLE_COLUMNS = (
+    ("created_at", "created_at"),
+    ("block_hash", "hash"),
+    ("size", "size"),
+    ("transaction_counter", "transaction_count"),
+    ("block_version", "version"),
+    ("previous_hash", "previous_hash"),
+    ("merkle_root_hash", "merkle_root"),
+    ("block_timestamp", "timestamp"),
+    ("nbits", "nbits"),
+    ("nonce", "nonce"),
+    ("height", "height"),
+    ("block_subsidy", "subsidy"),
+    ("block_input", "input"),
+    ("block_output", "output"),
+    ("transaction_fee", "transaction_fee"),
+)
+
+# The select list of the queries returning blocks.
+_BLOCK_SELECT = ",\n        ".join(column if column == field else f"{column} AS {field}" for column, field in _BLOCK_TABLE_COLUMNS)
+
+# The position of the columns of _BLOCK_SELECT.
+BLOCK_COLUMNS = {field: i for i, (_, field) in enumerate(_BLOCK_TABLE_COLUMNS)}
+
 # Retrieve a single block by its id.
-RETRIEVE = """
-    SELECT
-        created_at,
-        block_hash AS hash,
-        size,
-        transaction_counter AS transaction_count,
-        block_version AS version,
-        previous_hash,
-        merkle_root_hash AS merkle_root,
-        block_timestamp AS timestamp,
-        nbits,
-        nonce,
-        height,
-        block_subsidy AS subsidy,
-        block_input AS input,
-        block_output AS output,
-        transaction_fee
+RETRIEVE = f"""
+    SELECT {_BLOCK_SELECT}
     FROM btc.block
     WHERE block_hash = %(hash)s
 """
 
 # Create a block record.
-CREATE = """
+CREATE = f"""
     INSERT INTO btc.block (
         block_hash, size, transaction_counter, block_version,
         previous_hash, merkle_root_hash, block_timestamp, nbits,
@@ -34,65 +45,104 @@ CREATE = """
         %(previous_hash)s, %(merkle_root)s, %(timestamp)s, %(nbits)s,
         %(nonce)s, %(height)s, %(subsidy)s, %(input)s, %(output)s, %(transaction_fee)s
     )
-    RETURNING
-        block_hash AS hash,
-        size,
-        transaction_counter AS transaction_count,
-        block_version AS version,
-        previous_hash,
-        merkle_root_hash AS merkle_root,
-        block_timestamp AS timestamp,
-        nbits,
-        nonce,
-        height,
-        block_subsidy AS subsidy,
-        block_input AS input,
-        block_output AS output,
-        transaction_fee,
-        created_at
+    RETURNING {_BLOCK_SELECT}
+"""
+
+# Create block records in a single statement, the values are expanded by psycopg2.extras.execute_values.
+# Blocks that already exist are skipped and not returned.
+CREATE_BATCH = f"""
+    INSERT INTO btc.block (
+        block_hash, size, transaction_counter, block_version,
+        previous_hash, merkle_root_hash, block_timestamp, nbits,
+        nonce, height, block_subsidy, block_input, block_output, transaction_fee
+    ) VALUES %s
+    ON CONFLICT ON CONSTRAINT pk_block__block_hash DO NOTHING
+    RETURNING {_BLOCK_SELECT}
 """
 
+CREATE_BATCH_TEMPLATE = """(
+    %(hash)s, %(size)s, %(transaction_count)s, %(version)s,
+    %(previous_hash)s, %(merkle_root)s, %(timestamp)s, %(nbits)s,
+    %(nonce)s, %(height)s, %(subsidy)s, %(input)s, %(output)s, %(transaction_fee)s
+)"""
+
 # Delete a block record.
 DELETE = """
     DELETE FROM btc.block WHERE block_hash = %(hash)s
 """
 
+# Distinct nbits values of the stored blocks, to prewarm the difficulty cache.
+DISTINCT_NBITS = """
+    SELECT DISTINCT nbits FROM btc.block
+"""
+
 # List block records.
-# Pagination is based on the height because we can index
-# height with a Btree for fast retrieval and it supports inequality.
-# If using the block hash, we would not be able to take advantage of
-# an index to efficiently retrieve the data as HASH indices don't support inequality.
-LIST = """
-    WITH ranked AS (
-        SELECT
-            *,
-            RANK() OVER(ORDER BY created_at DESC, height DESC) AS rank
-        FROM btc.block
-        WHERE
-            CASE
-                WHEN %(before)s IS NOT NULL THEN height > %(before)s::INTEGER
-                WHEN %(after)s IS NOT NULL THEN height < %(after)s::INTEGER
-                ELSE TRUE
-            END
+# Pagination uses keysets on (height, block_hash) instead of offsets or window functions: the row comparison
+# is satisfied by the btree index on (height DESC, block_hash DESC) so a page costs the same regardless of
+# its position in the table. The block hash breaks ties between blocks at the same height (stale blocks).
+# One more row than the limit is fetched to know whether there are more blocks.
+
+# The most recent blocks.
+LIST = f"""
+    SELECT {_BLOCK_SELECT}
+    FROM btc.block
+    ORDER BY height DESC, block_hash DESC
+    LIMIT %(limit)s::INTEGER + 1
+"""
+
+# The blocks following a cursor, most recent first.
+LIST_AFTER = f"""
+    SELECT {_BLOCK_SELECT}
+    FROM btc.block
+    WHERE (height, block_hash) < (%(height)s::INTEGER, %(hash)s::BYTEA)
+    ORDER BY height DESC, block_hash DESC
+    LIMIT %(limit)s::INTEGER + 1
+"""
+
+# The blocks preceding a cursor, closest to the cursor first (the order is reversed by the service).
+LIST_BEFORE = f"""
+    SELECT {_BLOCK_SELECT}
+    FROM btc.block
+    WHERE (height, block_hash) > (%(height)s::INTEGER, %(hash)s::BYTEA)
+    ORDER BY height ASC, block_hash ASC
+    LIMIT %(limit)s::INTEGER + 1
+"""
+
+# Export block records in chain order, optionally within a range of heights.
+EXPORT = f"""
+    SELECT {_BLOCK_SELECT}
+    FROM btc.block
+    WHERE
+        (%(from_height)s::INTEGER IS NULL OR height >= %(from_height)s::INTEGER)
+        AND (%(to_height)s::INTEGER IS NULL OR height <= %(to_height)s::INTEGER)
+    ORDER BY height ASC, block_hash ASC
+"""
+
+# Bulk load blocks through a staging table.
+# The staging table is private to the session and emptied on commit, so each batch is loaded in its own transaction:
+# rows are copied into the staging table then merged into btc.block, skipping blocks that already exist.
+CREATE_STAGING = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS block_staging (LIKE btc.block INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+"""
+
+COPY_STAGING = """
+    COPY block_staging (
+        block_hash, size, transaction_counter, block_version,
+        previous_hash, merkle_root_hash, block_timestamp, nbits,
+        nonce, height, block_subsidy, block_input, block_output, transaction_fee
+    ) FROM STDIN WITH (FORMAT binary)
+"""
+
+MERGE_STAGING = """
+    INSERT INTO btc.block (
+        block_hash, size, transaction_counter, block_version,
+        previous_hash, merkle_root_hash, block_timestamp, nbits,
+        nonce, height, block_subsidy, block_input, block_output, transaction_fee
     )
-    SELECT
-        created_at,
-        block_hash AS hash,
-        size,
-        transaction_counter AS transaction_count,
-        block_version AS version,
-        previous_hash,
-        merkle_root_hash AS merkle_root,
-        block_timestamp AS timestamp,
-        nbits,
-        nonce,
-        height,
-        block_subsidy AS subsidy,
-        block_input AS input,
-        block_output AS output,
-        transaction_fee,
-        (SELECT MAX(rank) from ranked) > %(limit)s::INTEGER AS has_more,
-        %(limit)s::INTEGER AS count
-    FROM ranked
-    WHERE rank <= %(limit)s::INTEGER
+    SELECT DISTINCT ON (block_hash)
+        block_hash, size, transaction_counter, block_version,
+        previous_hash, merkle_root_hash, block_timestamp, nbits,
+        nonce, height, block_subsidy, block_input, block_output, transaction_fee
+    FROM block_staging
+    ON CONFLICT ON CONSTRAINT pk_block__block_hash DO NOTHING
 """
@@ -1,6 +1,9 @@
 """Helpers for the block blueprint.
 """
+import base64
 import decimal
+import struct
+from functools import lru_cache
 
 GENESIS_TARGET = decimal.Decimal(
     int("0x00000000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF", 16)
@@ -9,6 +12,17 @@ GENESIS_TARGET_TRUNCATED = decimal.Decimal(
     int("0x00000000FFFF0000000000000000000000000000000000000000000000000000", 16)
 )
 
+# a list cursor is the position of a block in the list: its height and the length of its hash, followed by the hash.
+# The hash is length prefixed as its size is not constrained by the block schema.
+CURSOR = struct.Struct(">IH")
+
+# the largest height, heights are stored in an INTEGER column.
+MAX_HEIGHT = 2 ** 31 - 1
+
+# the number of distinct nbits values to cache.
+# The target only changes every 2016 blocks so the whole chain has a few hundred distinct values.
+DIFFICULTY_CACHE_SIZE = 4096
+
 
 def compute_target(nbits: bytes) -> int:
     """Derive the target from the difficulty compact form stored with the block.
@@ -40,7 +54,7 @@ def compute_target(nbits: bytes) -> int:
     represented as a uint32 integer (4 bytes).
     :returns: the target of the block.
     """
-    exponent = int.from_bytes(nbits[-1], byteorder="little", signed=False)
+    exponent = int.from_bytes(nbits[-1:], byteorder="little", signed=False)
     mantissa = int.from_bytes(nbits[:-1], byteorder="little", signed=False)
     # since targets are never negative in practice, we don't care about the sign.
     # https://en.bitcoin.it/wiki/Difficulty#How_is_difficulty_stored_in_blocks.3F
@@ -70,3 +84,68 @@ def compute_bdiff(target):
     :type target: integer.
     """
     return GENESIS_TARGET_TRUNCATED / decimal.Decimal(target)
+
+
+def get_difficulty(nbits: bytes) -> dict:
+    """Return the difficulty information of a block, computed once per distinct nbits value.
+
+    :param nbits: the difficulty of the block in the compact form, ordered little endian.
+    :returns: the difficulty information. It is shared between blocks and must not be mutated.
+    """
+    return _get_difficulty(bytes(nbits))
+
+
+@lru_cache(maxsize=DIFFICULTY_CACHE_SIZE)
+def _get_difficulty(nbits: bytes) -> dict:
+    """Compute the difficulty information, see get_difficulty.
+    """
+    # the value is the hexadecimal representation of the target with the leading 0x.
+    target = compute_target(nbits)
+    return {
+        "target": f"{target:#066x}",
+        "pdifficulty": str(compute_pdiff(target)),
+        "bdifficulty": str(compute_bdiff(target)),
+        "nbits": int.from_bytes(nbits, byteorder="little", signed=False),
+    }
+
+
+def prewarm_difficulty(nbits_values) -> int:
+    """Compute the difficulty information of nbits values ahead of the requests.
+
+    :param nbits_values: the nbits values, as returned by the database.
+    :type nbits_values: iterable of bytes.
+    :returns: the number of values computed.
+    """
+    count = 0
+    for nbits in nbits_values:
+        get_difficulty(nbits)
+        count += 1
+    return count
+
+
+def encode_cursor(height: int, block_hash: bytes) -> str:
+    """Encode the position of a block in a list into an opaque cursor.
+
+    :param height: the height of the block.
+    :param block_hash: the hash of the block, as stored in the database.
+    :returns: the cursor, url safe.
+    """
+    data = CURSOR.pack(height, len(block_hash)) + bytes(block_hash)
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor created by encode_cursor.
+
+    :param cursor: the cursor.
+    :returns: the height and the hash of the block.
+    :raises ValueError: if the cursor is not valid.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        height, length = CURSOR.unpack_from(data)
+    except (ValueError, struct.error) as e:
+        raise ValueError(f"malformed cursor {cursor}") from e
+    if len(data) != CURSOR.size + length or height > MAX_HEIGHT:
+        raise ValueError(f"malformed cursor {cursor}")
+    return height, data[CURSOR.size :]
@@ -8,3 +8,4 @@ from api.blueprint.healthcheck import endpoint
 healthcheck = Blueprint("healthcheck", __name__, url_prefix="/")
 
 healthcheck.add_url_rule("", endpoint="ping", methods=["GET"], view_func=endpoint.ping)
+healthcheck.add_url_rule("stats", endpoint="stats", methods=["GET"], view_func=endpoint.stats)
@@ -0,0 +1,121 @@
+"""In-process cache for api resources.
+Blocks are immutable once stored, so lookups can be served from memory instead of the database.
+Entries are bounded in number (least recently used entries are evicted first) and in age: the time to live
+bounds how long an entry deleted by another server process can still be served.
+Within a process, every invalidation bumps a generation counter: a value read before an invalidation is not
+cached after it, so a concurrent read cannot put a deleted entry back.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class Cache:
+    """A thread-safe LRU cache with a time to live.
+    """
+
+    def __init__(self, size_key, ttl_key):
+        """Initialize the cache.
+
+        :param size_key: the configuration key of the maximum number of entries. A size of 0 disables the cache.
+        :type size_key: string.
+        :param ttl_key: the configuration key of the time to live of the entries, in seconds.
+        :type ttl_key: string.
+        """
+        self._size_key = size_key
+        self._ttl_key = ttl_key
+        self.max_size = 0
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Initialize the cache using the flask extension factory pattern.
+
+        :param app: the flask instance.
+        :type app: flask.Flask.
+        :returns: the configured flask application.
+        :rtype: flask.Flask.
+        """
+        self.max_size = app.config.get(self._size_key, 0)
+        self.ttl = app.config.get(self._ttl_key, 0)
+        self.clear()
+        return app
+
+    def get(self, key):
+        """Return a cached value.
+
+        :param key: the key of the value.
+        :returns: the value, None if the key is not cached or has expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation=None):
+        """Cache a value, evicting the least recently used entry if the cache is full.
+
+        :param key: the key of the value.
+        :param value: the value to cache. It must not be mutated once cached.
+        :param generation: the generation of the cache when the value was read. The value is not cached if an
+        entry was invalidated since then, as the value may be stale.
+        :type generation: integer.
+        """
+        if self.max_size <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Remove a value from the cache.
+
+        :param key: the key of the value.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self.generation += 1
+
+    def clear(self):
+        """Remove all values and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return statistics about the cache.
+        size is the current number of entries, hits and misses the number of lookups found and not found.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+block_cache = Cache("BLOCK_CACHE_SIZE", "BLOCK_CACHE_TTL")
@@ -22,13 +22,31 @@ class BaseConfig:
     DEBUG = True
     ENV = "production"
     SESSION_COOKIE_SECURE = True
-    MAX_CONTENT_LENGTH = 32768  # 32Kb
+    MAX_CONTENT_LENGTH = 65536  # 64Kb
 
     # Database configuration
     POOL_MIN_CONNECTONS = 2
     POOL_MAX_CONNECTONS = 6
+    POOL_TIMEOUT = 2  # seconds to wait for a connection before answering 503
+    POOL_VALIDATION_INTERVAL = 30  # seconds a connection stays idle before it is validated on checkout
+
+    # JSON backend of the responses: auto (orjson if installed), orjson or stdlib
+    JSON_BACKEND = "auto"
+
+    # Validate payloads with validators generated from the schemas instead of jsonschema
+    FAST_VALIDATION = True
 
     DEFAULT_LIMIT = 10
+    MAX_LIMIT = 100
+    MAX_BATCH_SIZE = 100
+    EXPORT_ITERSIZE = 2000
+
+    # Block cache configuration, a size of 0 disables the cache
+    BLOCK_CACHE_SIZE = 4096
+    BLOCK_CACHE_TTL = 3600  # seconds
+
+    # Compute the difficulty of the stored nbits values at startup, this scans the block table
+    DIFFICULTY_PREWARM = False
 
     @property
     def API_VERSION(self):
@@ -6,8 +6,11 @@ This module focuses on providing the database connection to the flask applicatio
 from contextlib import contextmanager
 
 from flask import g
+from psycopg2.extensions import cursor as TupleCursor
 from psycopg2.extras import RealDictCursor
-from psycopg2.pool import ThreadedConnectionPool
+
+from api.error.definition import ServiceUnavailable
+from api.pool import BlockingConnectionPool, PoolTimeout
 
 
 class Database:
@@ -24,6 +27,8 @@ class Database:
         """
         minconn = app.config.get("POOL_MIN_CONNECTONS", 2)
         maxconn = app.config.get("POOL_MAX_CONNECTONS", 6)
+        timeout = app.config.get("POOL_TIMEOUT", None)
+        validation_interval = app.config.get("POOL_VALIDATION_INTERVAL", 30)
         params = dict(
             dbname=app.config["DATABASE_NAME"],
             user=app.config["DATABASE_USER"],
@@ -33,20 +38,81 @@ class Database:
             cursor_factory=RealDictCursor,
         )
 
-        self.pool = ThreadedConnectionPool(minconn, maxconn, **params)
+        self.pool = BlockingConnectionPool(minconn, maxconn, timeout=timeout, validation_interval=validation_interval, **params)
         return app
 
+    @property
+    def connection(self):
+        """Returns the connection of the current request, checked out from the pool on first use.
+        g is thread-local so g._database_connection is thread-local. Requests that don't use the database
+        never hold a connection.
+        The connection is put back to the pool upon teardown, see release.
+        """
+        if "_database_connection" not in g:
+            try:
+                g._database_connection = self.pool.getconn()
+            except PoolTimeout:
+                raise ServiceUnavailable("No database connection available.")
+        return g._database_connection
+
+    def after_commit(self, callback):
+        """Register a function to call once the transaction of the current request is committed.
+        The function is not called if the transaction is rolled back.
+
+        :param callback: the function to call, without arguments.
+        :type callback: callable.
+        """
+        g.setdefault("_database_after_commit", []).append(callback)
+
+    def release(self, exception=None):
+        """End the transaction of the current request (rollback if an exception occurred, commit otherwise)
+        and put the connection back to the pool. Nothing happens if the request did not use the database.
+        The functions registered with after_commit are called once the transaction is committed.
+
+        :param exception: the exception that occurred during the request if any.
+        :type exception: Exception.
+        """
+        callbacks = g.pop("_database_after_commit", [])
+        connection = g.pop("_database_connection", None)
+        if connection is None:
+            return
+        close = False
+        try:
+            if exception:
+                connection.rollback()
+            else:
+                connection.commit()
+        except Exception:
+            close = True
+            raise
+        finally:
+            self.pool.putconn(connection, close=close)
+        if not exception:
+            for callback in callbacks:
+                callback()
+
     @contextmanager
-    def cursor(self):
-        """Returns a cursor from a thread-local connection for use within the context of a request.
-        g is thread-local so g._database_connection is thread-local.
+    def cursor(self, name=None, itersize=None, tuples=False):
+        """Returns a cursor from the connection of the current request.
         In psycpopg2, a connection can spawn multiple cursors which are not isolated. Commit and
         rollback takes effect at the connection level and thus affect all statements executed by
         the cursors spawned from that connection.
         The connection is closed/put back to the pool upon teardown.
         If an exception occur, the transaction is rolled back, otherwise it is committed.
+        A named cursor is a server-side cursor: rows are fetched from the server itersize rows at a time
+        while iterating over the cursor instead of all at once.
+
+        :param name: the name of the server-side cursor, None for a client-side cursor.
+        :type name: string.
+        :param itersize: the number of rows fetched at a time by a server-side cursor.
+        :type itersize: integer.
+        :param tuples: whether to fetch rows as plain tuples instead of dictionaries. Columns are then mapped by position.
+        :type tuples: bool.
         """
-        cursor = g._database_connection.cursor()
+        cursor_factory = TupleCursor if tuples else None
+        cursor = self.connection.cursor(name=name, cursor_factory=cursor_factory)
+        if itersize is not None:
+            cursor.itersize = itersize
         try:
             yield cursor
         finally:
@@ -2,6 +2,8 @@
 """
 from flask import current_app, request
 
+from api.error.definition import InvalidParameter
+
 
 def listable(f):
     """Extract pagination and list parameters from the url and pass it to the endpoint.
@@ -9,11 +11,24 @@ def listable(f):
     """
 
     def wrapped(*args, **kwargs):
+        limit = _to_limit(request.args.get("limit", current_app.config["DEFAULT_LIMIT"]), current_app.config["MAX_LIMIT"])
         pagination = {
             "after": request.args.get("after"),
             "before": request.args.get("before"),
-            "limit": int(request.args.get("limit", current_app.config["DEFAULT_LIMIT"])),
+            "limit": limit,
         }
         return f(*args, **kwargs, pagination=pagination)
 
     return wrapped
+
+
+def _to_limit(value, max_limit):
+    """Convert the limit query string parameter to an integer between 1 and max_limit.
+    """
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= max_limit:
+        raise InvalidParameter("limit", f"expected an integer between 1 and {max_limit}")
+    return limit
@@ -24,6 +24,10 @@ class ErrorCode(Enum):
     REQUIRED_FIELD = "required_field"
     UNKNOWN_FIELD = "unknown_field"
     INVALID_TYPE = "invalid_type"
+    INVALID_VALUE = "invalid_value"
+    INVALID_PARAMETER = "invalid_parameter"
+    RESOURCE_ALREADY_EXISTS = "resource_already_exists"
+    SERVICE_UNAVAILABLE = "service_unavailable"
 
 
 class BaseError(Exception):
@@ -70,6 +74,29 @@ class ResourceNotFound(BaseError):
         super().__init__()
 
 
+class ResourceAlreadyExists(BaseError):
+    """Error raised when creating a resource that already exists.
+    """
+
+    def __init__(self, resource, id_, parameter=None):
+        """Constructor.
+
+        :param resource: the resource created (e.g. block).
+        :type resource: ApiResource.
+        :param id_: the id of the existing resource.
+        :type id_: string.
+        :param parameter: the parameter that caused the error if any.
+        :type parameter: string.
+        """
+        self.type = ErrorType.INVALID_REQUEST
+        self.code = ErrorCode.RESOURCE_ALREADY_EXISTS
+        self.status = HTTPStatus.CONFLICT
+        self.message = f"{resource.value.capitalize()} already exists: {id_}."
+        self.parameter = parameter
+        self.url = None
+        super().__init__()
+
+
 class UnknownField(BaseError):
     """Error raised when an unknown field is found in a request payload.
     """
@@ -128,3 +155,59 @@ class InvalidType(BaseError):
         self.parameter = None
         self.url = None
         super().__init__()
+
+
+class InvalidValue(BaseError):
+    """Error raised when a payload contains a field whose value is not allowed.
+    """
+
+    def __init__(self, path: deque, reason: str):
+        """Constructor.
+
+        :param path: the path to the field.
+        :param reason: why the value is not allowed.
+        """
+        self.type = ErrorType.INVALID_REQUEST
+        self.code = ErrorCode.INVALID_VALUE
+        self.status = HTTPStatus.BAD_REQUEST
+        self.message = f"Invalid field value at: $.{'.'.join(path)} ({reason})."
+        self.parameter = None
+        self.url = None
+        super().__init__()
+
+
+class InvalidParameter(BaseError):
+    """Error raised when a query string parameter is not valid.
+    """
+
+    def __init__(self, parameter: str, reason: str):
+        """Constructor.
+
+        :param parameter: the name of the invalid parameter.
+        :param reason: why the value is not valid.
+        """
+        self.type = ErrorType.INVALID_REQUEST
+        self.code = ErrorCode.INVALID_PARAMETER
+        self.status = HTTPStatus.BAD_REQUEST
+        self.message = f"Invalid parameter {parameter}: {reason}."
+        self.parameter = parameter
+        self.url = None
+        super().__init__()
+
+
+class ServiceUnavailable(BaseError):
+    """Error raised when the api cannot serve the request for now, e.g. when the database is overloaded.
+    """
+
+    def __init__(self, message: str):
+        """Constructor.
+
+        :param message: the reason the service is unavailable.
+        """
+        self.type = ErrorType.API_ERROR
+        self.code = ErrorCode.SERVICE_UNAVAILABLE
+        self.status = HTTPStatus.SERVICE_UNAVAILABLE
+        self.message = message
+        self.parameter = None
+        self.url = None
+        super().__init__()
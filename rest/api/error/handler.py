@@ -7,7 +7,13 @@ from flask import current_app, jsonify
 from jsonschema.exceptions import ValidationError
 from werkzeug.exceptions import HTTPException, InternalServerError
 
-from api.error.definition import BaseError, InvalidType, RequiredField, UnknownField
+from api.error.definition import BaseError, InvalidType, InvalidValue, RequiredField, UnknownField
+
+# there is currently no way using jsonschema to know what field
+# caused the error except that parsing the error string
+# https://github.com/Julian/jsonschema/issues/119
+REQUIRED_FIELD = re.compile(r"^'([a-z0-9_]+)' is a required property$")
+UNKNOWN_FIELD = re.compile(r"^Additional properties are not allowed \('([a-z0-9_]+)' was unexpected\)$")
 
 
 def jsonify_error_handler(exception):
@@ -32,29 +38,26 @@ def jsonify_error_handler(exception):
         return jsonify(exception), exception.code
     if isinstance(exception, ValidationError):
         current_app.logger.warning(exception.message)
-        return jsonify(_extract_validation_error(exception)), HTTPStatus.BAD_REQUEST
+        return jsonify(extract_validation_error(exception)), HTTPStatus.BAD_REQUEST
     current_app.logger.exception(str(exception))
     return jsonify(InternalServerError()), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-def _extract_validation_error(exception: ValidationError) -> BaseError:
+def extract_validation_error(exception: ValidationError) -> BaseError:
     """Convert a ValidationError into its BaseError representation.
     
     :param exception: the exception to convert.
     """
-    # there is currently no way using jsonschema to know what field
-    # caused the error except that parsing the error string
-    # https://github.com/Julian/jsonschema/issues/119
     if exception.validator == "required":
-        regex = r"^'([a-z0-9_]+)' is a required property$"
-        pattern = re.compile(regex)
-        field = pattern.match(exception.message).group(1)
+        field = REQUIRED_FIELD.match(exception.message).group(1)
         return RequiredField(field, exception.path)
     if exception.validator == "additionalProperties" and not exception.validator_value:
-        regex = r"^Additional properties are not allowed \('([a-z0-9_]+)' was unexpected\)$"
-        pattern = re.compile(regex)
-        field = pattern.match(exception.message).group(1)
+        field = UNKNOWN_FIELD.match(exception.message).group(1)
         return UnknownField(field, exception.path)
     if exception.validator == "type":
         return InvalidType(exception.path, exception.validator_value)
+    if exception.validator == "const":
+        return InvalidValue(exception.path, f"expected {exception.validator_value!r}")
+    if exception.validator == "enum":
+        return InvalidValue(exception.path, "expected one of " + ", ".join(repr(v) for v in exception.validator_value))
     return InternalServerError()
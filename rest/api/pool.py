@@ -0,0 +1,195 @@
+"""Blocking connection pool.
+psycopg2.pool.ThreadedConnectionPool raises PoolError as soon as all connections are in use. This pool makes
+callers wait for a connection instead, up to a timeout, which absorbs bursts of requests. Connections are also
+validated before being handed out: connections closed by the server (restart, idle timeout) are replaced by
+new ones instead of failing the request.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError
+
+
+class PoolTimeout(PoolError):
+    """Error raised when no connection is available before the timeout.
+    """
+
+
+class BlockingConnectionPool:
+    """A thread-safe pool of connections where callers wait for a connection to be available.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=None, validation_interval=30.0, **kwargs):
+        """Constructor.
+
+        :param minconn: the number of connections opened upfront.
+        :type minconn: integer.
+        :param maxconn: the maximum number of connections.
+        :type maxconn: integer.
+        :param timeout: the default number of seconds to wait for a connection, None to wait forever.
+        :type timeout: float.
+        :param validation_interval: the number of seconds a connection can stay idle before it is validated with a
+        round trip to the server when checked out. Connections known to be closed are always replaced.
+        :type validation_interval: float.
+        :param kwargs: the parameters of psycopg2.connect.
+        """
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validation_interval = validation_interval
+        self._kwargs = kwargs
+        # idle connections with the time they were put back, the most recently used last.
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.recycled = 0
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        """Open a new connection.
+        """
+        return psycopg2.connect(**self._kwargs)
+
+    def getconn(self, timeout=None):
+        """Check out a connection, waiting for one to be put back if all are in use.
+
+        :param timeout: the number of seconds to wait, defaults to the timeout of the pool.
+        :type timeout: float.
+        :raises PoolTimeout: if no connection is available before the timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            connection, idle_since = self._checkout(deadline)
+            if connection is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._discard()
+                    raise
+            if self._is_alive(connection, idle_since):
+                return connection
+            connection.close()
+            self._discard(recycled=True)
+
+    def _checkout(self, deadline):
+        """Take an idle connection, or reserve a slot for a new connection (None is returned).
+        """
+        with self._condition:
+            if self._closed:
+                raise PoolError("connection pool is closed")
+            waited = False
+            start = time.monotonic()
+            try:
+                while not self._idle and self._size >= self.maxconn:
+                    waited = True
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout("no connection available before the timeout")
+                    self._condition.wait(remaining)
+            finally:
+                if waited:
+                    self.waits += 1
+                    self.wait_time += time.monotonic() - start
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+            return None, None
+
+    def _is_alive(self, connection, idle_since):
+        """Check that a connection can be used.
+        """
+        if connection.closed or connection.info.transaction_status == TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - idle_since < self.validation_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _discard(self, recycled=False):
+        """Release the slot of a connection that is closed.
+        """
+        with self._condition:
+            self._size -= 1
+            self.recycled += recycled
+            self._condition.notify()
+
+    def putconn(self, connection, close=False):
+        """Put back a connection into the pool.
+        An open transaction is rolled back. Broken connections are closed and replaced on demand.
+
+        :param connection: the connection checked out with getconn.
+        :param close: whether to close the connection instead of keeping it in the pool.
+        :type close: bool.
+        """
+        if not close and not connection.closed and connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                close = True
+        if close or connection.closed or self._closed:
+            if not connection.closed:
+                connection.close()
+            self._discard()
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of a context.
+
+        :param timeout: the number of seconds to wait, defaults to the timeout of the pool.
+        :type timeout: float.
+        """
+        connection = self.getconn(timeout=timeout)
+        try:
+            yield connection
+        finally:
+            self.putconn(connection)
+
+    def closeall(self):
+        """Close the idle connections and the connections put back from now on.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            connection.close()
+
+    def stats(self) -> dict:
+        """Return statistics about the pool.
+        in_use and idle are the current number of connections, waits the number of checkouts that had to wait,
+        wait_time the total number of seconds spent waiting, timeouts the number of checkouts that timed out and
+        recycled the number of dead connections replaced.
+        """
+        with self._condition:
+            idle = len(self._idle)
+            return {
+                "in_use": self._size - idle,
+                "idle": idle,
+                "size": self._size,
+                "max_size": self.maxconn,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+            }
@@ -7,6 +7,7 @@ class ApiResource(Enum):
     """Enum of the supported api resources.
     """
 
+    BATCH = "batch"
     BLOCK = "block"
     ERROR = "error"
     LIST = "list"
@@ -1,8 +1,13 @@
 """Schema cache for resource validation.
+Validators are compiled once when the store is initialized. With FAST_VALIDATION, the validators are generated
+from the schemas as specialized code raising api errors directly, jsonschema is used otherwise.
 """
 import json
 
+from jsonschema import Draft7Validator
+
 from api.resource import ApiResource
+from api.validation import compile_validator
 
 
 class SchemaStore:
@@ -11,6 +16,7 @@ class SchemaStore:
 
     def __init__(self):
         self._store = {}
+        self._validators = {}
 
     def init_app(self, app):
         """Initialize the schema store using the flask extension factory pattern.
@@ -20,13 +26,42 @@ class SchemaStore:
         """
         with open("rest/api/blueprint/block/block.schema.json") as f:
             self._store[ApiResource.BLOCK] = json.load(f)
+        fast = app.config.get("FAST_VALIDATION", False)
+        for resource, schema in self._store.items():
+            self._validators[resource] = self._compile(schema, fast)
         return app
 
+    @staticmethod
+    def _compile(schema, fast):
+        """Compile the validator of a schema.
+
+        :param schema: the JSON schema.
+        :type schema: dict.
+        :param fast: whether to generate a fast validator. jsonschema is used if the schema is not supported.
+        :type fast: bool.
+        :returns: a function validating data against the schema.
+        """
+        if fast:
+            try:
+                return compile_validator(schema)
+            except ValueError:
+                pass
+        return Draft7Validator(schema).validate
+
     @property
     def block(self):
         """Return the block schema.
         """
         return self._store[ApiResource.BLOCK]
 
+    def validate_block(self, data):
+        """Validate data against the block schema.
+
+        :param data: the data to validate.
+        :raises api.error.definition.BaseError: if the data is not valid and the validator is a fast validator.
+        :raises jsonschema.exceptions.ValidationError: if the data is not valid and the validator is a jsonschema validator.
+        """
+        self._validators[ApiResource.BLOCK](data)
+
 
 store = SchemaStore()
@@ -0,0 +1,179 @@
+"""Response serialization.
+Responses are serialized to bytes by a JSON backend picked at startup: orjson when it is installed, the standard
+library otherwise. With the standard library, the fields of the block and list resources are known in advance
+so they are written straight to bytes from precomputed templates instead of going through the JSONEncoder.
+orjson is faster than the templates so it serializes every resource. Keys are sorted like flask.jsonify does.
+"""
+from functools import lru_cache
+
+from flask import Response
+from werkzeug.exceptions import HTTPException
+
+from api.config import version
+from api.error.definition import BaseError
+from api.error.serialization import http_exception_as_json
+from api.serialization.encoding import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MIMETYPE = "application/json"
+
+BLOCK_TEMPLATE = (
+    b'{"api_version":"' + version.API_VERSION.encode() + b'",'
+    b'"created_at":%d,'
+    b'"difficulty":%b,'
+    b'"hash":"%b",'
+    b'"height":%d,'
+    b'"input":%d,'
+    b'"merkle_root":"%b",'
+    b'"nonce":%d,'
+    b'"object":"block",'
+    b'"output":%d,'
+    b'"previous_hash":"%b",'
+    b'"size":%d,'
+    b'"subsidy":%d,'
+    b'"timestamp":%d,'
+    b'"transaction_count":%d,'
+    b'"transaction_fee":%d,'
+    b'"version":%d}'
+)
+
+LIST_TEMPLATE = (
+    b'{"api_version":"' + version.API_VERSION.encode() + b'",'
+    b'"count":%d,'
+    b'"data":[%b],'
+    b'"has_more":%b,'
+    b'"next_cursor":%b,'
+    b'"object":"list",'
+    b'"previous_cursor":%b}'
+)
+
+DIFFICULTY_TEMPLATE = b'{"bdifficulty":"%b","nbits":%d,"pdifficulty":"%b","target":"%b"}'
+
+
+def _default(obj):
+    """Serialize the api types that orjson does not support natively. Enums are supported natively.
+    """
+    if isinstance(obj, BaseError):
+        return obj.as_json()
+    if isinstance(obj, HTTPException):
+        return http_exception_as_json(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _orjson_dumps(obj) -> bytes:
+    """Serialize an object with orjson.
+    """
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS)
+
+
+_stdlib_encoder = JSONEncoder(separators=(",", ":"), sort_keys=True)
+
+
+def _stdlib_dumps(obj) -> bytes:
+    """Serialize an object with the standard library.
+    """
+    return _stdlib_encoder.encode(obj).encode()
+
+
+@lru_cache(maxsize=4096)
+def _encode_difficulty(nbits, target, pdifficulty, bdifficulty) -> bytes:
+    """Encode the difficulty of a block, once per distinct difficulty.
+    """
+    return DIFFICULTY_TEMPLATE % (bdifficulty.encode(), nbits, pdifficulty.encode(), target.encode())
+
+
+def _cursor(cursor) -> bytes:
+    """Encode a list cursor, cursors are url safe so they don't need escaping.
+    """
+    return b"null" if cursor is None else b'"' + cursor.encode() + b'"'
+
+
+def encode_block(data: dict) -> bytes:
+    """Serialize a block from the block template.
+
+    :param data: the block, as returned by the block services.
+    """
+    difficulty = data["difficulty"]
+    return BLOCK_TEMPLATE % (
+        data["created_at"],
+        _encode_difficulty(difficulty["nbits"], difficulty["target"], difficulty["pdifficulty"], difficulty["bdifficulty"]),
+        data["hash"].encode(),
+        data["height"],
+        data["input"],
+        data["merkle_root"].encode(),
+        data["nonce"],
+        data["output"],
+        data["previous_hash"].encode(),
+        data["size"],
+        data["subsidy"],
+        data["timestamp"],
+        data["transaction_count"],
+        data["transaction_fee"],
+        data["version"],
+    )
+
+
+def encode_list(data: dict) -> bytes:
+    """Serialize a list of blocks from the list template.
+
+    :param data: the list wrapper object, as returned by the block services.
+    """
+    return LIST_TEMPLATE % (
+        data["count"],
+        b",".join(encode_block(block_data) for block_data in data["data"]),
+        b"true" if data["has_more"] else b"false",
+        _cursor(data["next_cursor"]),
+        _cursor(data["previous_cursor"]),
+    )
+
+
+# the functions serializing any object, a block and a list of blocks, by backend.
+BACKENDS = {"stdlib": (_stdlib_dumps, encode_block, encode_list)}
+if orjson is not None:
+    BACKENDS["orjson"] = (_orjson_dumps, _orjson_dumps, _orjson_dumps)
+
+
+class Serializer:
+    """Serialize api resources to JSON.
+    """
+
+    def __init__(self):
+        self.backend = "stdlib"
+        self.dumps, self.block, self.list_ = BACKENDS[self.backend]
+
+    def init_app(self, app):
+        """Pick the JSON backend using the flask extension factory pattern.
+        The JSON_BACKEND configuration is either auto (orjson if installed), orjson or stdlib.
+
+        :param app: the flask instance.
+        :type app: flask.Flask.
+        :returns: the configured flask application.
+        :rtype: flask.Flask.
+        """
+        backend = app.config.get("JSON_BACKEND", "auto")
+        if backend == "auto":
+            backend = "orjson" if "orjson" in BACKENDS else "stdlib"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unavailable JSON backend: {backend}.")
+        self.backend = backend
+        self.dumps, self.block, self.list_ = BACKENDS[backend]
+        return app
+
+    def response(self, body, status) -> Response:
+        """Create a JSON response.
+
+        :param body: the serialized body, or an object to serialize with the backend.
+        :type body: bytes or any serializable object.
+        :param status: the status of the response.
+        :type status: http.HTTPStatus.
+        """
+        if not isinstance(body, bytes):
+            body = self.dumps(body)
+        return Response(body, status=status, mimetype=MIMETYPE)
+
+
+serializer = Serializer()
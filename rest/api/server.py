@@ -2,15 +2,18 @@
 """
 from flask import Flask
 
-from api import before, teardown
+from api import teardown
+from api.blueprint.block import services as block_services
 from api.blueprint.block.router import block
 from api.blueprint.healthcheck.router import healthcheck
+from api.cache import block_cache
 from api.config.default import LocalConfig
 from api.database import db
 from api.error.handler import jsonify_error_handler
 from api.logging.config import LocalConfig as LocalLoggerConfig
 from api.schema import store
 from api.serialization.encoding import JSONEncoder
+from api.serialization.serializer import serializer
 
 
 def _register_blueprints(app):
@@ -38,6 +41,47 @@ def _register_database(app):
     return app
 
 
+def _register_caches(app):
+    """Register in-process caches.
+
+    :param app: the Flask instance.
+    :type app: flask.Flask.
+    :returns: the configured Flask instance.
+    :rtype: flask.Flask.
+    """
+    return block_cache.init_app(app)
+
+
+def _prewarm_difficulty(app):
+    """Compute the difficulty of the stored blocks ahead of the requests.
+
+    :param app: the Flask instance.
+    :type app: flask.Flask.
+    :returns: the configured Flask instance.
+    :rtype: flask.Flask.
+    """
+    if app.config.get("DIFFICULTY_PREWARM", False):
+        # the difficulty is computed on demand anyway: the server must start even if the database is unreachable.
+        try:
+            count = block_services.prewarm_difficulty()
+        except Exception as e:
+            app.logger.exception(f"difficulty prewarm failed: {e}")
+        else:
+            app.logger.info(f"difficulty computed for {count} nbits values.")
+    return app
+
+
+def _register_serializer(app):
+    """Register the response serializer.
+
+    :param app: the Flask instance.
+    :type app: flask.Flask.
+    :returns: the configured Flask instance.
+    :rtype: flask.Flask.
+    """
+    return serializer.init_app(app)
+
+
 def _register_error_handlers(app):
     """Register error handlers.
     
@@ -83,7 +127,9 @@ def create_app(secret, environment):
     _ = _register_blueprints(app)
     _ = _register_error_handlers(app)
     _ = _register_schemas(app)
-    _ = app.before_request(before.acquire_database_connection)
+    _ = _register_caches(app)
+    _ = _register_serializer(app)
+    _ = _prewarm_difficulty(app)
     _ = app.teardown_request(teardown.release_database_connection)
 
     return app
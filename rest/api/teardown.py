@@ -1,13 +1,13 @@
 """Teardown request and app context hooks.
 """
-from flask import current_app, g
+from flask import current_app
 
 from api.database import db
 
 
 def release_database_connection(exception, *args, **kwargs):
     """End the current database transaction (either commit or rollback) and release the connection
-    back to the pool.
+    back to the pool, if the request used the database.
     This coincides with the one connection per thread/request model.
     This must be registered on REQUEST context teardown (and NOT on the app context teardown) to ensure:
     - it is always executed
@@ -20,12 +20,7 @@ def release_database_connection(exception, *args, **kwargs):
     :rtype: None.
     """
     try:
-        if exception:
-            g._database_connection.rollback()
-        else:
-            g._database_connection.commit()
-        db.pool.putconn(g._database_connection)
-        g.pop("_database_connection")
+        db.release(exception)
     except Exception as e:
         current_app.logger.exception(e)
     return None
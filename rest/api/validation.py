@@ -0,0 +1,128 @@
+"""Fast validation of request payloads.
+A validator is generated from a JSON schema as specialized Python code: there is no schema walking at validation
+time and errors are raised directly as api errors, without parsing jsonschema messages.
+Only the subset of JSON schema used by the api resources is supported:
+type, properties, required, additionalProperties (false), enum and const.
+"""
+from collections import deque
+
+from api.error.definition import InvalidType, InvalidValue, RequiredField, UnknownField
+
+# python checks of the JSON schema types. Booleans are not integers nor numbers.
+# Like Draft 7, floats with a zero fractional part are integers.
+TYPE_CHECKS = {
+    "object": "isinstance({0}, dict)",
+    "array": "isinstance({0}, list)",
+    "string": "isinstance({0}, str)",
+    "integer": "((isinstance({0}, int) and not isinstance({0}, bool)) or (isinstance({0}, float) and {0}.is_integer()))",
+    "number": "(isinstance({0}, (int, float)) and not isinstance({0}, bool))",
+    "boolean": "isinstance({0}, bool)",
+    "null": "{0} is None",
+}
+
+# keywords that do not constrain the value.
+ANNOTATIONS = {"$schema", "$id", "title", "description", "readOnly", "writeOnly", "default", "examples"}
+
+SUPPORTED = ANNOTATIONS | {"type", "properties", "required", "additionalProperties", "enum", "const"}
+
+
+class _Generator:
+    """Generate the source code of a validator.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+
+    def constant(self, value):
+        """Store a value in the namespace of the validator and return its name.
+        """
+        name = f"_c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def emit(self, depth, line):
+        """Add a line of code.
+        """
+        self.lines.append("    " * depth + line)
+
+    def schema(self, schema, variable, path, depth):
+        """Generate the checks of a value.
+
+        :param schema: the schema of the value.
+        :param variable: the name of the variable holding the value.
+        :param path: the path to the value, a list of field names.
+        :param depth: the indentation level.
+        """
+        unsupported = set(schema) - SUPPORTED
+        if unsupported:
+            raise ValueError(f"Unsupported JSON schema keywords: {', '.join(sorted(unsupported))}.")
+        path_name = self.constant(tuple(path))
+        type_ = schema.get("type")
+        if type_ is not None:
+            types = [type_] if isinstance(type_, str) else type_
+            unknown = [t for t in types if t not in TYPE_CHECKS]
+            if unknown:
+                raise ValueError(f"Unsupported JSON schema types: {', '.join(map(str, unknown))}.")
+            check = " or ".join(TYPE_CHECKS[t].format(variable) for t in types)
+            self.emit(depth, f"if not ({check}):")
+            self.emit(depth + 1, f"raise InvalidType(deque({path_name}), {' or '.join(types)!r})")
+        if "const" in schema:
+            self.emit(depth, f"if {variable} != {self.constant(schema['const'])}:")
+            self.emit(depth + 1, f"raise InvalidValue(deque({path_name}), {'expected ' + repr(schema['const'])!r})")
+        if "enum" in schema:
+            self.emit(depth, f"if {variable} not in {self.constant(list(schema['enum']))}:")
+            expected = "expected one of " + ", ".join(repr(v) for v in schema["enum"])
+            self.emit(depth + 1, f"raise InvalidValue(deque({path_name}), {expected!r})")
+        if type_ == "object":
+            self.object(schema, variable, path, path_name, depth)
+
+    def object(self, schema, variable, path, path_name, depth):
+        """Generate the checks of the fields of an object, once its type is checked.
+        """
+        properties = schema.get("properties", {})
+        for field in schema.get("required", ()):
+            self.emit(depth, f"if {field!r} not in {variable}:")
+            self.emit(depth + 1, f"raise RequiredField({field!r}, deque({path_name}))")
+        additional = schema.get("additionalProperties", True)
+        if additional is False:
+            self.emit(depth, f"for field in {variable}:")
+            self.emit(depth + 1, f"if field not in {self.constant(frozenset(properties))}:")
+            self.emit(depth + 2, f"raise UnknownField(field, deque({path_name}))")
+        elif additional is not True:
+            raise ValueError("Only boolean additionalProperties are supported.")
+        for i, (field, subschema) in enumerate(properties.items()):
+            value = f"v{depth}_{i}"
+            self.emit(depth, f"if {field!r} in {variable}:")
+            self.emit(depth + 1, f"{value} = {variable}[{field!r}]")
+            start = len(self.lines)
+            self.schema(subschema, value, path + [field], depth + 1)
+            if len(self.lines) == start:
+                # the property is only annotated.
+                self.lines[-2:] = []
+
+
+def compile_validator(schema: dict):
+    """Generate a validator from a JSON schema.
+
+    :param schema: the JSON schema.
+    :returns: a function taking the data to validate and raising an api error if the data is not valid.
+    :raises ValueError: if the schema uses keywords that are not supported.
+    """
+    generator = _Generator()
+    generator.emit(0, "def validate(data):")
+    generator.schema(schema, "data", [], 1)
+    generator.emit(1, "return None")
+    namespace = dict(
+        generator.constants,
+        deque=deque,
+        InvalidType=InvalidType,
+        InvalidValue=InvalidValue,
+        RequiredField=RequiredField,
+        UnknownField=UnknownField,
+    )
+    source = "\n".join(generator.lines)
+    exec(compile(source, f"<validator {schema.get('title', 'schema')}>", "exec"), namespace)  # pylint: disable=exec-used
+    validate = namespace["validate"]
+    validate.source = source
+    return validate
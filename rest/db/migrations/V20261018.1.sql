@@ -0,0 +1,7 @@
+/* keyset pagination lists blocks by height then hash, most recent first.
+ * the index covers the (height, block_hash) row comparisons of the list queries in both directions
+ * and makes the index on height alone redundant.
+**/
+CREATE INDEX idx_block__height_block_hash ON btc.block USING BTREE (height DESC, block_hash DESC);
+
+DROP INDEX btc.idx_block__height;
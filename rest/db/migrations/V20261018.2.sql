@@ -0,0 +1,5 @@
+/* the block version is an unsigned 32 bits integer in the block header.
+ * like the nonce, it is stored as BIGINT since PostgreSQL does not support unsigned integers: versions
+ * of 2^31 and above do not fit in an INTEGER.
+**/
+ALTER TABLE btc.block ALTER COLUMN block_version TYPE BIGINT;
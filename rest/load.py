@@ -0,0 +1,131 @@
+"""Entrypoint to bulk load the blocks of a bitcoind blocks/ directory into the database.
+The loader needs both the api and the blockchain packages: run it from the root of the repository with
+PYTHONPATH=. python rest/load.py --blocks <path to blocks/>
+"""
+import argparse
+import json
+import os
+from functools import partial
+
+import psycopg2
+
+from api.blueprint.block import loader
+from blockchain import amount, chain, ingest, utxo
+from blockchain.block import Block, BlockHeader
+
+
+def to_record(data, with_changes=False):
+    """Convert serialized block data to a block json schema object, except for the height dependent values.
+    This runs in the ingest worker processes.
+
+    :param data: the serialized block.
+    :param with_changes: whether to compute the changes the block makes to the set of unspent outputs.
+    :returns: the serialized header, the record, the value of the coinbase, the output of the other transactions,
+    and the outpoints spent and created by the block if requested.
+    """
+    block = Block.deserialize(data)
+    spent, created = None, None
+    if with_changes:
+        coinbase_value, output, spent, created = utxo.changes(block)
+    else:
+        transactions = iter(block.transactions)
+        coinbase = next(transactions)
+        coinbase_value = sum(output.value for output in coinbase.outputs)
+        output = sum(output.value for transaction in transactions for output in transaction.outputs)
+    # hashes are displayed and stored in reverse byte order.
+    record = {
+        "hash": block.hash[::-1].hex(),
+        "size": len(data),
+        "transaction_count": block.transaction_count,
+        "version": block.version,
+        "previous_hash": block.prev_block[::-1].hex(),
+        "merkle_root": block.merkle_root[::-1].hex(),
+        "timestamp": block.timestamp,
+        "difficulty": {"nbits": block.bits},
+        "nonce": block.nonce,
+    }
+    return bytes(block.header.raw), record, coinbase_value, output, spent, created
+
+
+def records(directory, workers=None, cache=None):
+    """Parse the blocks of the main chain of a blocks/ directory into block json schema objects.
+    The headers are indexed first to select the main chain: stale blocks, forks and blocks written twice are
+    not loaded. The blocks are then parsed and yielded in height order, so they are also applied to the cache
+    of unspent outputs in chain order.
+
+    :param directory: the bitcoind blocks/ directory.
+    :param workers: the number of parser processes.
+    :param cache: the cache of unspent outputs used to compute the input of each block. The amounts are derived
+    from the coinbase if not provided.
+    :type cache: blockchain.utxo.UTXOCache.
+    :returns: a generator of block json schema objects.
+    """
+    index = chain.build_directory(directory, workers=workers)
+    heights = {entry.hash: entry.height for entry in index.main_chain()}
+    # blocks are written out of order: a block waits until the blocks below it are yielded.
+    waiting = {}
+    next_height = 0
+    handler = partial(to_record, with_changes=cache is not None)
+    for _, _, (raw, *parsed) in ingest.ingest(directory, handler=handler, workers=workers):
+        # a block is only loaded the first time it is read.
+        height = heights.pop(bytes(BlockHeader.deserialize(raw).hash), None)
+        if height is None:
+            continue
+        waiting[height] = parsed
+        while next_height in waiting:
+            record, coinbase_value, output, spent, created = waiting.pop(next_height)
+            record["height"] = next_height
+            if cache is None:
+                amounts = amount.from_coinbase(next_height, coinbase_value, output)
+            else:
+                input_ = cache.apply(next_height, spent, created)
+                amounts = utxo.amounts(next_height, input_, coinbase_value, output)
+            record.update(amounts._asdict())
+            next_height += 1
+            yield record
+
+
+def run(secret, directory, batch_size, writers, workers, utxo_path=None, utxo_entries=utxo.MAX_ENTRIES):
+    """Load the blocks into the database.
+    """
+    with open(secret) as f:
+        config = json.load(f)
+    connect = partial(
+        psycopg2.connect,
+        dbname=config["DATABASE_NAME"],
+        user=config["DATABASE_USER"],
+        password=config["DATABASE_PASSWORD"],
+        host=config["DATABASE_HOST"],
+        port=config["DATABASE_PORT"],
+    )
+    cache = utxo.UTXOCache(utxo_path, max_entries=utxo_entries) if utxo_path else None
+    try:
+        blocks = records(directory, workers=workers, cache=cache)
+        inserted = sum(loader.load(blocks, connect, batch_size=batch_size, writers=writers))
+    finally:
+        if cache is not None:
+            cache.close()
+    print(f"{inserted} blocks loaded.")
+    if cache is not None:
+        print(f"utxo cache: {cache.hit_rate:.2%} hit rate, {cache.spilled} spilled, {cache.missing} missing.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load blocks into the database.", prog="yabe-load")
+    parser.add_argument(
+        "--environment",
+        help="The environment to load the blocks into.",
+        choices=["local"],
+        default="local",
+    )
+    parser.add_argument("--blocks", help="The bitcoind blocks/ directory.", required=True)
+    parser.add_argument("--batch-size", help="The number of blocks per COPY.", type=int, default=loader.BATCH_SIZE)
+    parser.add_argument("--writers", help="The number of writer connections.", type=int, default=loader.WRITERS)
+    parser.add_argument("--workers", help="The number of parser processes.", type=int, default=None)
+    parser.add_argument("--utxo", help="The path to the on-disk store of the utxo cache, enables exact amounts.", default=None)
+    parser.add_argument(
+        "--utxo-entries", help="The number of unspent outputs kept in memory.", type=int, default=utxo.MAX_ENTRIES
+    )
+    ns = parser.parse_args()
+    filepath = os.path.abspath(f"rest/api/config/{ns.environment}.secret.json")
+    run(filepath, ns.blocks, ns.batch_size, ns.writers, ns.workers, utxo_path=ns.utxo, utxo_entries=ns.utxo_entries)
@@ -0,0 +1,62 @@
+"""Tests of the validation of batch items.
+Run from the rest/ directory: python -m pytest tests
+"""
+import os
+
+import pytest
+from flask import Flask
+
+from api.blueprint.block import services
+from api.error.definition import ErrorCode
+from api.schema import store
+
+ROOT = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)
+
+BLOCK = {
+    "hash": "00000000000000000008281025b946b5f9b742009028b6ac998bed5432d68f56",
+    "size": 1265370,
+    "transaction_count": 2770,
+    "version": 536870912,
+    "previous_hash": "000000000000000000056bbed1b5d7ac1c37cca5bfe8e7ac1e5fb2ac6d2ab05d",
+    "merkle_root": "2f2a3e0e2b3f4c3a7a5b44e2c5b8c0b8e1d3e02ba4b2e8f6e6a2d7c5b1a3f4e5",
+    "timestamp": 1573257446,
+    "difficulty": {"nbits": 387297854},
+    "nonce": 1234567,
+    "height": 602000,
+    "subsidy": 1250000000,
+    "input": 0,
+    "output": 0,
+    "transaction_fee": 0,
+}
+
+
+def _without(field):
+    data = dict(BLOCK)
+    del data[field]
+    return data
+
+
+@pytest.fixture(params=[False, True], ids=["jsonschema", "fast"])
+def app(request, monkeypatch):
+    app = Flask(__name__)
+    app.config.update(FAST_VALIDATION=request.param)
+    monkeypatch.chdir(ROOT)
+    store.init_app(app)
+    return app
+
+
+def test_batch_reports_items_missing_insert_fields(app):
+    items = [
+        _without("difficulty"),
+        _without("height"),
+        dict(BLOCK, merkle_root="not hexadecimal"),
+        _without("nonce"),
+    ]
+    with app.app_context():
+        result = services.create_batch(items)
+    assert result["created"] == 0
+    assert result["failed"] == len(items)
+    assert [r["index"] for r in result["data"]] == [0, 1, 2, 3]
+    assert [r["status"] for r in result["data"]] == [400] * len(items)
+    codes = [r["error"].code for r in result["data"]]
+    assert codes == [ErrorCode.REQUIRED_FIELD, ErrorCode.REQUIRED_FIELD, ErrorCode.INVALID_VALUE, ErrorCode.REQUIRED_FIELD]
@@ -0,0 +1,103 @@
+"""Tests of the block cache invalidation.
+Run from the rest/ directory: python -m pytest tests
+"""
+import pytest
+from flask import Flask
+
+from api.blueprint.block import services
+from api.cache import block_cache
+from api.database import db
+
+BLOCK_HASH = "00000000000000000008281025b946b5f9b742009028b6ac998bed5432d68f56"
+
+
+class FakeCursor:
+    def __init__(self, events):
+        self.events = events
+
+    def execute(self, query, params=None):
+        self.events.append("execute")
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Record the statements and the end of the transaction, with the state of the cache at commit time.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def cursor(self, name=None, cursor_factory=None):
+        return FakeCursor(self.events)
+
+    def commit(self):
+        self.events.append(("commit", block_cache.get(BLOCK_HASH) is not None))
+
+    def rollback(self):
+        self.events.append("rollback")
+
+
+class FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def getconn(self):
+        return self.connection
+
+    def putconn(self, connection, close=False):
+        pass
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(BLOCK_CACHE_SIZE=16, BLOCK_CACHE_TTL=3600)
+    block_cache.init_app(app)
+    return app
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(db, "pool", FakePool(connection), raising=False)
+    return connection
+
+
+def test_delete_invalidates_after_commit(app, connection):
+    with app.test_request_context():
+        block_cache.set(BLOCK_HASH, {"hash": BLOCK_HASH})
+        services.delete(BLOCK_HASH.upper())
+        # a concurrent retrieve before the commit still sees the block and caches it again.
+        block_cache.set(BLOCK_HASH, {"hash": BLOCK_HASH})
+        db.release(None)
+    assert connection.events == ["execute", ("commit", True)]
+    assert block_cache.get(BLOCK_HASH) is None
+
+
+def test_delete_rolled_back_keeps_cache(app, connection):
+    with app.test_request_context():
+        block_cache.set(BLOCK_HASH, {"hash": BLOCK_HASH})
+        services.delete(BLOCK_HASH)
+        db.release(Exception())
+    assert connection.events == ["execute", "rollback"]
+    assert block_cache.get(BLOCK_HASH) is not None
+
+
+def test_read_before_delete_is_not_cached(app, connection):
+    with app.test_request_context():
+        # a concurrent retrieve reads the block before the delete is committed.
+        generation = block_cache.generation
+        services.delete(BLOCK_HASH)
+        db.release(None)
+    block_cache.set(BLOCK_HASH, {"hash": BLOCK_HASH}, generation=generation)
+    assert block_cache.get(BLOCK_HASH) is None
+
+
+def test_stats_count_lookups(app):
+    block_cache.set(BLOCK_HASH, {"hash": BLOCK_HASH})
+    block_cache.get(BLOCK_HASH)
+    block_cache.get("unknown")
+    stats = block_cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 1, 0.5)
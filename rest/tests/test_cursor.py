@@ -0,0 +1,27 @@
+"""Tests of the list cursors.
+Run from the rest/ directory: python -m pytest tests
+"""
+import base64
+
+import pytest
+
+from api.blueprint.block import util
+
+
+@pytest.mark.parametrize("block_hash", [bytes(range(32)), b"\x01\x02\x03", bytes(40)])
+def test_cursor_round_trip(block_hash):
+    assert util.decode_cursor(util.encode_cursor(602000, block_hash)) == (602000, block_hash)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        util.CURSOR.pack(util.MAX_HEIGHT + 1, 1) + b"\x00",
+        util.CURSOR.pack(1, 32) + bytes(31),
+        util.CURSOR.pack(1, 32) + bytes(33),
+        b"\x00",
+    ],
+)
+def test_malformed_cursor(data):
+    with pytest.raises(ValueError):
+        util.decode_cursor(base64.urlsafe_b64encode(data).decode("ascii"))
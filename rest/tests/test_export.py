@@ -0,0 +1,65 @@
+"""Tests of the block export.
+Run from the rest/ directory: python -m pytest tests
+"""
+import pytest
+from flask import Flask
+
+from api.blueprint.block import services
+from api.database import db
+from api.error.definition import ServiceUnavailable
+from api.pool import PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, events):
+        self.events = events
+
+    def execute(self, query, params=None):
+        self.events.append("execute")
+
+    def __iter__(self):
+        self.events.append("fetch")
+        return iter(())
+
+    def close(self):
+        self.events.append("close")
+
+
+class FakeConnection:
+    def __init__(self):
+        self.events = []
+
+    def cursor(self, name=None, cursor_factory=None):
+        return FakeCursor(self.events)
+
+
+class FakePool:
+    def __init__(self, connection=None):
+        self.connection = connection
+
+    def getconn(self):
+        if self.connection is None:
+            raise PoolTimeout("no connection available before the timeout")
+        return self.connection
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_export_executes_before_iteration(app, monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(db, "pool", FakePool(connection), raising=False)
+    with app.test_request_context():
+        blocks = services.export()
+        assert connection.events == ["execute"]
+        assert list(blocks) == []
+    assert connection.events == ["execute", "fetch", "close"]
+
+
+def test_export_pool_timeout_is_raised_by_the_call(app, monkeypatch):
+    monkeypatch.setattr(db, "pool", FakePool(), raising=False)
+    with app.test_request_context():
+        with pytest.raises(ServiceUnavailable):
+            services.export()
@@ -0,0 +1,99 @@
+"""Tests of the fast validator against jsonschema.
+Run from the rest/ directory: python -m pytest tests
+"""
+import json
+import os
+
+import pytest
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import ValidationError
+
+from api.error.handler import extract_validation_error
+from api.schema import SchemaStore
+from api.validation import compile_validator
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "api", "blueprint", "block", "block.schema.json")
+
+with open(SCHEMA_PATH) as f:
+    SCHEMA = json.load(f)
+
+BLOCK = {
+    "object": "block",
+    "hash": "00000000000000000008281025b946b5f9b742009028b6ac998bed5432d68f56",
+    "size": 1265370,
+    "transaction_count": 2770,
+    "version": 536870912,
+    "previous_hash": "000000000000000000056bbed1b5d7ac1c37cca5bfe8e7ac1e5fb2ac6d2ab05d",
+    "merkle_root": "2f2a3e0e2b3f4c3a7a5b44e2c5b8c0b8e1d3e02ba4b2e8f6e6a2d7c5b1a3f4e5",
+    "timestamp": 1573257446,
+    "difficulty": {"nbits": 387297854},
+    "nonce": 1234567,
+    "height": 602000,
+    "subsidy": 1250000000,
+    "input": 0,
+    "output": 0,
+    "transaction_fee": 0,
+}
+
+
+def _with(**fields):
+    data = dict(BLOCK)
+    data.update(fields)
+    return data
+
+
+def _without(field):
+    data = dict(BLOCK)
+    del data[field]
+    return data
+
+
+PAYLOADS = [
+    BLOCK,
+    _with(size=1265370.0),
+    _with(size=1265370.5),
+    _with(size=True),
+    _with(size="1265370"),
+    _with(size=None),
+    _with(difficulty={"nbits": 387297854.0}),
+    _with(difficulty={"nbits": False}),
+    _with(difficulty={}),
+    _with(hash=1),
+    _with(object="transaction"),
+    _with(api_version="0.0.1"),
+    _with(unknown=1),
+    _without("hash"),
+    [],
+]
+
+
+def _fast(data):
+    try:
+        compile_validator(SCHEMA)(data)
+    except Exception as e:  # pylint: disable=broad-except
+        return e
+    return None
+
+
+def _draft7(data):
+    try:
+        Draft7Validator(SCHEMA).validate(data)
+    except ValidationError as e:
+        return extract_validation_error(e)
+    return None
+
+
+@pytest.mark.parametrize("data", PAYLOADS)
+def test_fast_validator_matches_draft7(data):
+    fast, draft7 = _fast(data), _draft7(data)
+    assert type(fast) is type(draft7)
+    if draft7 is not None:
+        assert fast.as_json() == draft7.as_json()
+
+
+def test_unknown_type_falls_back_to_draft7():
+    schema = {"type": "object", "properties": {"size": {"type": "unsigned"}}}
+    with pytest.raises(ValueError):
+        compile_validator(schema)
+    validate = SchemaStore._compile(schema, fast=True)
+    assert isinstance(validate.__self__, Draft7Validator)